@@ -1,4 +1,10 @@
+import argparse
 import os
+import re
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, List, Optional
 from crewai import Agent, Task, Crew, Process
 
 #os.environ["OPENAI_API_KEY"] = "YOUR KEY"
@@ -6,70 +12,167 @@ from crewai import Agent, Task, Crew, Process
 # You can choose to use a local model through Ollama for example.
 #
 from langchain.llms import Ollama
-ollama_llm = Ollama(model="mistral")
+from langchain.llms.base import LLM
 
 # Install duckduckgo-search for this example:
 # !pip install -U duckduckgo-search
 
-from langchain.tools import DuckDuckGoSearchRun
-search_tool = DuckDuckGoSearchRun()
-
-# Define your agents with roles and goals
-researcher = Agent(
-  role='Senior Research Analyst',
-  goal='Uncover cutting-edge developments in AI and data science',
-  backstory="""You work at a leading tech think tank.
-  Your expertise lies in identifying emerging trends.
-  You have a knack for dissecting complex data and presenting
-  actionable insights.""",
-  verbose=True,
-  allow_delegation=False,
-  tools=[search_tool],
-  # You can pass an optional llm attribute specifying what mode you wanna use.
-  # It can be a local model through Ollama / LM Studio or a remote
-  # model like OpenAI, Mistral, Antrophic of others (https://python.langchain.com/docs/integrations/llms/)
-  #
-  # Examples:
-  llm=ollama_llm # was defined above in the file
-  # llm=ChatOpenAI(model_name="gpt-3.5", temperature=0.7)
-)
-writer = Agent(
-  role='Tech Content Strategist',
-  goal='Craft compelling content on tech advancements',
-  backstory="""You are a renowned Content Strategist, known for
-  your insightful and engaging articles.
-  You transform complex concepts into compelling narratives.""",
-  verbose=True,
-  allow_delegation=True,
-  llm=ollama_llm
-)
-
-# Create tasks for your agents
-task1 = Task(
-  description="""Conduct a comprehensive analysis of the latest advancements in AI in 2024.
-  Identify key trends, breakthrough technologies, and potential industry impacts.
-  Your final answer MUST be a full analysis report""",
-  agent=researcher
-)
-
-task2 = Task(
-  description="""Using the insights provided, develop an engaging blog
-  post that highlights the most significant AI advancements.
-  Your post should be informative yet accessible, catering to a tech-savvy audience.
-  Make it sound cool, avoid complex words so it doesn't sound like AI.
-  Your final answer MUST be the full blog post of at least 4 paragraphs.""",
-  agent=writer
-)
-
-# Instantiate your crew with a sequential process
-crew = Crew(
-  agents=[researcher, writer],
-  tasks=[task1, task2],
-  verbose=2, # You can set it to 1 or 2 to different logging levels
-)
-
-# Get your crew to work!
-result = crew.kickoff()
-
-print("######################")
-print(result)
+from langchain.tools import DuckDuckGoSearchRun, Tool
+
+from llm_cache import DEFAULT_CACHE_PATH, OfflineMiss, PersistentCache, StepMetrics
+
+# The shared example package lives next to the RAG scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'rag-langchain', 'sources'))
+from llm_insights.resources import ollama_url
+
+# Ollama server, override with e.g. OLLAMA_HOST=127.0.0.1:11435
+OLLAMA_HOST = ollama_url(os.getenv('OLLAMA_HOST'))
+
+def timed_call(cache, metrics, agent, kind, request, compute):
+    """Run one agent step through the cache (when there is one) and record its latency."""
+    computed = []
+
+    def call():
+        computed.append(True)
+        return compute()
+
+    start = time.perf_counter()
+    try:
+        return cache.get_or_compute(kind, request, call) if cache is not None else call()
+    finally:
+        metrics.record(agent, kind, time.perf_counter() - start, cached=not computed)
+
+class CachedOllama(LLM):
+    """Ollama LLM whose completions are cached and counted per agent."""
+
+    llm: Any
+    cache: Any = None
+    metrics: Any
+    agent: str
+
+    @property
+    def _llm_type(self) -> str:
+        return "cached-ollama"
+
+    def _call(self, prompt: str, stop: Optional[List[str]] = None, run_manager=None, **kwargs: Any) -> str:
+        request = {"model": self.llm.model, "prompt": prompt, "stop": stop}
+        return timed_call(self.cache, self.metrics, self.agent, 'llm', request,
+                          lambda: self.llm.invoke(prompt, stop=stop))
+
+def cached_search_tool(search, cache, metrics, agent):
+    """DuckDuckGo search with the same name and description, answered from the cache when possible."""
+    def run(query):
+        return timed_call(cache, metrics, agent, 'tool', {"tool": search.name, "query": query.strip()},
+                          lambda: search.run(query))
+    return Tool(name=search.name, description=search.description, func=run)
+
+def build_crew(topic, ollama_llm, search_tool, cache, metrics, verbose):
+    """Researcher and writer for one topic; each crew gets its own agents so crews can run side by side."""
+    researcher_name = f"researcher [{topic}]"
+    writer_name = f"writer [{topic}]"
+
+    # Define your agents with roles and goals
+    researcher = Agent(
+      role='Senior Research Analyst',
+      goal=f'Uncover cutting-edge developments in {topic}',
+      backstory="""You work at a leading tech think tank.
+      Your expertise lies in identifying emerging trends.
+      You have a knack for dissecting complex data and presenting
+      actionable insights.""",
+      verbose=verbose,
+      allow_delegation=False,
+      tools=[cached_search_tool(search_tool, cache, metrics, researcher_name)],
+      # You can pass an optional llm attribute specifying what mode you wanna use.
+      # It can be a local model through Ollama / LM Studio or a remote
+      # model like OpenAI, Mistral, Antrophic of others (https://python.langchain.com/docs/integrations/llms/)
+      llm=CachedOllama(llm=ollama_llm, cache=cache, metrics=metrics, agent=researcher_name)
+    )
+    writer = Agent(
+      role='Tech Content Strategist',
+      goal=f'Craft compelling content on {topic}',
+      backstory="""You are a renowned Content Strategist, known for
+      your insightful and engaging articles.
+      You transform complex concepts into compelling narratives.""",
+      verbose=verbose,
+      allow_delegation=True,
+      llm=CachedOllama(llm=ollama_llm, cache=cache, metrics=metrics, agent=writer_name)
+    )
+
+    # Create tasks for your agents
+    task1 = Task(
+      description=f"""Conduct a comprehensive analysis of the latest advancements in {topic}.
+      Identify key trends, breakthrough technologies, and potential industry impacts.
+      Your final answer MUST be a full analysis report""",
+      agent=researcher
+    )
+
+    task2 = Task(
+      description=f"""Using the insights provided, develop an engaging blog
+      post that highlights the most significant advancements in {topic}.
+      Your post should be informative yet accessible, catering to a tech-savvy audience.
+      Make it sound cool, avoid complex words so it doesn't sound like AI.
+      Your final answer MUST be the full blog post of at least 4 paragraphs.""",
+      agent=writer
+    )
+
+    # The writer needs the research, so each topic stays sequential; topics run in parallel
+    return Crew(
+      agents=[researcher, writer],
+      tasks=[task1, task2],
+      process=Process.sequential,
+      verbose=2 if verbose else 0,
+    )
+
+def slugify(topic):
+    return re.sub(r'[^a-z0-9]+', '-', topic.lower()).strip('-') or 'report'
+
+def main():
+    parser = argparse.ArgumentParser(description='Research and blog-post crews for several topics at once, using a local Ollama model and DuckDuckGo search. '
+                                                 'Search results and completions are cached, so repeated runs are fast and can be replayed offline.')
+    parser.add_argument('topics', nargs='*', default=['AI in 2024'], help="Topics to research (default: 'AI in 2024')")
+    parser.add_argument('-m', '--model', default='mistral', help='Ollama model (default: mistral)')
+    parser.add_argument('-j', '--parallel', type=int, default=3, help='Topics researched at the same time (default: 3)')
+    parser.add_argument('-o', '--output-dir', default='reports', help='Directory for the <topic>.md results (default: reports)')
+    parser.add_argument('--cache', default=DEFAULT_CACHE_PATH, help=f'SQLite cache for searches and completions (default: {DEFAULT_CACHE_PATH})')
+    parser.add_argument('--no-cache', action='store_true', help='Call search and the model every time')
+    parser.add_argument('--offline', action='store_true', help='Replay from the cache only; calls that were never recorded fail')
+    parser.add_argument('-v', '--verbose', action='store_true', help='Print the agents\' reasoning (interleaved when topics run in parallel)')
+    args = parser.parse_args()
+
+    cache = None if args.no_cache else PersistentCache(args.cache, offline=args.offline)
+    metrics = StepMetrics()
+    ollama_llm = Ollama(model=args.model, base_url=OLLAMA_HOST)
+    search_tool = DuckDuckGoSearchRun()
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    def run(topic):
+        start = time.perf_counter()
+        # Get your crew to work!
+        result = build_crew(topic, ollama_llm, search_tool, cache, metrics, args.verbose).kickoff()
+        path = os.path.join(args.output_dir, f"{slugify(topic)}.md")
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(str(result))
+        return path, time.perf_counter() - start
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.parallel) as executor:
+        futures = {executor.submit(run, topic): topic for topic in args.topics}
+        for future in as_completed(futures):
+            topic = futures[future]
+            try:
+                path, seconds = future.result()
+                print(f"######################\n{topic}: report written to {path} ({seconds:.1f}s)")
+            except OfflineMiss as e:
+                print(f"######################\n{topic}: cannot replay offline, {e}")
+            except Exception as e:
+                print(f"######################\n{topic}: failed ({e})")
+
+    metrics.report()
+    if cache is not None:
+        for kind, counts in sorted(cache.counts.items()):
+            print(f"{kind} cache: " + ", ".join(f"{name} {count}" for name, count in sorted(counts.items())))
+        cache.close()
+    print(f"{len(args.topics)} topics in {time.perf_counter() - start:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'llm-app-insights', 'crewai.sqlite')
+
+class OfflineMiss(KeyError):
+    """Raised in offline mode when a call was never recorded."""
+
+class PersistentCache:
+    """SQLite-backed cache for search and LLM calls, shared by every thread of a run.
+
+    Identical calls that are in flight at the same time are deduplicated: the
+    first one does the work and the others wait for its result. In offline mode
+    nothing is computed and a miss raises OfflineMiss, so a recorded run can be
+    replayed without network access.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, offline=False):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.offline = offline
+        self.lock = threading.Lock()
+        self.connection = sqlite3.connect(path, check_same_thread=False)
+        self.connection.execute('PRAGMA journal_mode=WAL')
+        self.connection.execute('CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, kind TEXT, request TEXT, response TEXT, created REAL)')
+        self.connection.commit()
+        self.inflight = {}
+        self.counts = defaultdict(lambda: defaultdict(int))
+
+    @staticmethod
+    def key(kind, request):
+        return hashlib.sha256(json.dumps([kind, request], sort_keys=True).encode('utf-8')).hexdigest()
+
+    def _lookup(self, key):
+        row = self.connection.execute('SELECT response FROM cache WHERE key = ?', (key,)).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def get_or_compute(self, kind, request, compute):
+        """Return the cached response for `request`, calling `compute()` at most once across threads on a miss."""
+        key = self.key(kind, request)
+        with self.lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                self.counts[kind]['hits'] += 1
+                return cached
+            if self.offline:
+                self.counts[kind]['offline_misses'] += 1
+                raise OfflineMiss(f"{kind} call not in {self.path}: {json.dumps(request)[:200]}")
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self.inflight[key] = Future()
+                self.counts[kind]['misses'] += 1
+            else:
+                self.counts[kind]['deduplicated'] += 1
+        if not owner:
+            return future.result()
+
+        try:
+            response = compute()
+        except BaseException as e:
+            with self.lock:
+                del self.inflight[key]
+            future.set_exception(e)
+            raise
+        with self.lock:
+            self.connection.execute('INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)',
+                                    (key, kind, json.dumps(request), json.dumps(response), time.time()))
+            self.connection.commit()
+            del self.inflight[key]
+        future.set_result(response)
+        return response
+
+    def close(self):
+        with self.lock:
+            self.connection.close()
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+class StepMetrics:
+    """Per-agent latency of every LLM and tool step, and how many were answered from the cache."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.steps = defaultdict(list)
+
+    def record(self, agent, kind, seconds, cached):
+        with self.lock:
+            self.steps[agent].append((kind, seconds, cached))
+
+    def report(self):
+        print(f"\n{'agent':<28}{'llm':>6}{'cached':>8}{'tool':>6}{'cached':>8}{'p50 s':>8}{'p95 s':>8}{'total s':>9}")
+        with self.lock:
+            for agent, steps in sorted(self.steps.items()):
+                llm = [step for step in steps if step[0] == 'llm']
+                tool = [step for step in steps if step[0] == 'tool']
+                latencies = [seconds for _, seconds, _ in steps]
+                print(f"{agent:<28}{len(llm):>6}{sum(cached for _, _, cached in llm):>8}"
+                      f"{len(tool):>6}{sum(cached for _, _, cached in tool):>8}"
+                      f"{percentile(latencies, 50):>8.2f}{percentile(latencies, 95):>8.2f}{sum(latencies):>9.1f}")
@@ -0,0 +1,117 @@
+import json
+import time
+import uuid
+from fastapi import Body, FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+
+SAMPLING_RANGES = {"temperature": (0, 2), "top_p": (0, 1), "presence_penalty": (-2, 2), "frequency_penalty": (-2, 2)}
+# OpenAI parameters the pool cannot honour; rejecting them beats silently ignoring them
+UNSUPPORTED_PARAMS = {"n", "logprobs", "top_logprobs", "logit_bias", "tools", "tool_choice",
+                      "functions", "function_call", "response_format", "seed"}
+
+def create_api(pool, model_name, settings):
+    """OpenAI-compatible chat completions API served from the worker pool.
+
+    max_tokens is capped at --max-tokens and every request is bounded by
+    --request-timeout, including the time spent waiting for a worker.
+    temperature, top_p, the penalties and stop are passed through to the
+    model; other parameters that would change the output are rejected.
+    """
+    api = FastAPI()
+
+    @api.get("/v1/models")
+    def list_models():
+        return {"object": "list", "data": [{"id": model_name, "object": "model", "owned_by": "local"}]}
+
+    @api.get("/v1/stats")
+    def stats():
+        return pool.stats()
+
+    @api.post("/v1/chat/completions")
+    def chat_completions(body: dict = Body(...)):
+        messages = body.get("messages")
+        if not isinstance(messages, list) or not messages or not all(isinstance(m, dict) and 'role' in m and 'content' in m for m in messages):
+            return _error(400, "'messages' must be a list of {role, content} objects", 'invalid_request_error', 'messages')
+        requested = body.get("max_tokens")
+        if requested is not None and (isinstance(requested, bool) or not isinstance(requested, int) or requested < 1):
+            return _error(400, "'max_tokens' must be a positive integer", 'invalid_request_error', 'max_tokens')
+        max_tokens = min(requested or settings.max_tokens, settings.max_tokens)
+        unsupported = sorted(name for name in UNSUPPORTED_PARAMS & body.keys()
+                             if body[name] not in (None, False) and not (name == "n" and body[name] == 1))
+        if unsupported:
+            return _error(400, f"'{unsupported[0]}' is not supported", 'invalid_request_error', unsupported[0])
+        sampling = {}
+        for name, (low, high) in SAMPLING_RANGES.items():
+            value = body.get(name)
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)) or not low <= value <= high:
+                return _error(400, f"'{name}' must be a number between {low} and {high}", 'invalid_request_error', name)
+            sampling[name] = value
+        stop = body.get("stop")
+        if stop is not None:
+            if isinstance(stop, str):
+                stop = [stop]
+            if not isinstance(stop, list) or len(stop) > 4 or not all(isinstance(s, str) for s in stop):
+                return _error(400, "'stop' must be a string or a list of up to 4 strings", 'invalid_request_error', 'stop')
+            sampling['stop'] = stop
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        created = int(time.time())
+        deltas = pool.chat(messages, max_tokens=max_tokens, timeout=settings.request_timeout, sampling=sampling)
+
+        if body.get("stream"):
+            return StreamingResponse(_stream(deltas, completion_id, created, model_name), media_type="text/event-stream")
+
+        parts = []
+        try:
+            while True:
+                parts.append(next(deltas))
+        except StopIteration as stop:
+            finish_reason = stop.value
+        except TimeoutError as e:
+            return _error(504, str(e), 'timeout')
+        except RuntimeError as e:
+            # The worker failed or exited mid-request
+            return _error(500, str(e), 'server_error')
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model_name,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(parts)}, "finish_reason": finish_reason}],
+            "usage": {"completion_tokens": len(parts)},
+        }
+
+    return api
+
+def _error(status_code, message, error_type, param=None):
+    """An error response in the OpenAI format, so client libraries can report it."""
+    return JSONResponse(status_code=status_code,
+                        content={"error": {"message": message, "type": error_type, "param": param, "code": None}})
+
+def _stream(deltas, completion_id, created, model_name):
+    """Format the pool's deltas as server-sent events in the OpenAI chunk format."""
+    def event(delta, finish_reason=None):
+        chunk = {
+            "id": completion_id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model_name,
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(chunk)}\n\n"
+
+    yield event({"role": "assistant"})
+    try:
+        while True:
+            yield event({"content": next(deltas)})
+    except StopIteration as stop:
+        yield event({}, stop.value)
+    except TimeoutError as e:
+        yield f"data: {json.dumps({'error': {'message': str(e), 'type': 'timeout'}})}\n\n"
+    except RuntimeError as e:
+        yield f"data: {json.dumps({'error': {'message': str(e), 'type': 'server_error'}})}\n\n"
+    finally:
+        # Frees the worker when the client disconnects mid-stream
+        deltas.close()
+    yield "data: [DONE]\n\n"
@@ -1,53 +1,80 @@
 import os
 import json
+import time
 import gradio as gr
-from llama_cpp import Llama
+import uvicorn
+from api import create_api
+from config import load_settings, model_kwargs
+from pool import ModelPool
 
 # Get environment variables
 model_id = os.getenv('MODEL')
 quant = os.getenv('QUANT')
 chat_template = os.getenv('CHAT_TEMPLATE')
 
+# Model loading settings from the command line or environment, auto-sized from the host
+settings = load_settings()
+
 # Interface variables
 model_name = model_id.split('/')[1].split('-GGUF')[0]
 title = f"{model_name}"
 description = f"Chat with <a href=\"https://huggingface.co/{model_id}\">{model_name}</a> in GGUF format ({quant})!"
 
-# Initialize the LLM
-llm = Llama(model_path="model.gguf",
-            n_ctx=32768,
-            n_threads=2,
-            chat_format=chat_template)
-
 # Function for streaming chat completions
-def chat_stream_completion(message, history, system_prompt):
+def chat_stream_completion(message, history, system_prompt, request: gr.Request = None):
     messages_prompts = [{"role": "system", "content": system_prompt}]
     for human, assistant in history:
         messages_prompts.append({"role": "user", "content": human})
         messages_prompts.append({"role": "assistant", "content": assistant})
     messages_prompts.append({"role": "user", "content": message})
 
-    response = llm.create_chat_completion(
-        messages=messages_prompts,
-        stream=True
-    )
-    message_repl = ""
-    for chunk in response:
-        if len(chunk['choices'][0]["delta"]) != 0 and "content" in chunk['choices'][0]["delta"]:
-            message_repl = message_repl + chunk['choices'][0]["delta"]["content"]
-        yield message_repl
-
-# Gradio chat interface
-gr.ChatInterface(
-    fn=chat_stream_completion,
-    title=title,
-    description=description,
-    additional_inputs=[gr.Textbox("You are helpful medical assistant.")],
-    additional_inputs_accordion="System prompt",
-    examples=[
-        ["How to diagnose CHF?"],
-        ["please write an extensive cancer patient story and case study for healthcare providers"],
-        ["Also, please write journey how the cancer was discovered and what symptoms led to patient realization that something might be wrong."], 
-        ["Additionally, please write up the intake scenario for her to be seen by a cancer specialist."]
-    ]
-).queue().launch(server_name="0.0.0.0")
+    # Collect the streamed pieces and rebuild the reply at most every --stream-interval seconds,
+    # instead of concatenating on every token
+    parts = []
+    last_yield = time.perf_counter()
+    # The browser session keeps users who start with the same example question apart
+    session = request.session_hash if request is not None else None
+    for content in pool.chat(messages_prompts, max_tokens=settings.max_tokens, timeout=settings.request_timeout, session=session):
+        parts.append(content)
+        now = time.perf_counter()
+        if now - last_yield >= settings.stream_interval:
+            last_yield = now
+            yield "".join(parts)
+    yield "".join(parts)
+
+if __name__ == "__main__":
+    print(f"Host: {settings.cpus} CPUs, {settings.memory >> 20} MB RAM. Loading {settings.workers} worker(s) with "
+          f"n_ctx={settings.n_ctx}, n_threads={settings.n_threads}, n_batch={settings.n_batch}, kv_type={settings.kv_type}, "
+          f"use_mmap={settings.use_mmap}, use_mlock={settings.use_mlock}", flush=True)
+    pool = ModelPool(settings.workers, model_kwargs(settings, chat_template),
+                     prompt_cache_bytes=settings.prompt_cache_mb << 20)
+    pool.start()
+
+    with gr.Blocks(title=title) as demo:
+        # Gradio chat interface
+        gr.ChatInterface(
+            fn=chat_stream_completion,
+            title=title,
+            description=description,
+            additional_inputs=[gr.Textbox("You are helpful medical assistant.")],
+            additional_inputs_accordion="System prompt",
+            examples=[
+                ["How to diagnose CHF?"],
+                ["please write an extensive cancer patient story and case study for healthcare providers"],
+                ["Also, please write journey how the cancer was discovered and what symptoms led to patient realization that something might be wrong."],
+                ["Additionally, please write up the intake scenario for her to be seen by a cancer specialist."]
+            ]
+        )
+        # Queue depth and latency readout for the worker pool
+        with gr.Accordion("Server status", open=False):
+            status = gr.Markdown()
+            refresh = gr.Button("Refresh")
+        refresh.click(pool.status_markdown, outputs=status)
+        demo.load(pool.status_markdown, outputs=status)
+
+    # Requests wait in the pool's scheduler instead of Gradio's per-event queue
+    demo.queue(default_concurrency_limit=None)
+
+    # Serve the OpenAI-compatible /v1 API and the Gradio UI from the same process
+    app = gr.mount_gradio_app(create_api(pool, model_name, settings), demo, path="/")
+    uvicorn.run(app, host="0.0.0.0", port=settings.port)
@@ -0,0 +1,146 @@
+import argparse
+import inspect
+import os
+import resource
+import sys
+
+# GGML tensor types accepted for the KV cache (llama.cpp enum values)
+KV_TYPES = {'f32': 0, 'f16': 1, 'q4_0': 2, 'q8_0': 8}
+# Bytes per element relative to f16, used to estimate KV cache size
+KV_TYPE_SCALE = {'f32': 2.0, 'f16': 1.0, 'q8_0': 0.53, 'q4_0': 0.28}
+
+def host_cpus():
+    """Number of CPUs this process may use, honouring affinity and cgroup quotas."""
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            cpus = min(cpus, max(1, int(quota) // int(period)))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+def host_memory_bytes():
+    """Physical memory available to this process, honouring the cgroup memory limit."""
+    memory = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    try:
+        with open('/sys/fs/cgroup/memory.max') as f:
+            limit = f.read().strip()
+        if limit != 'max':
+            memory = min(memory, int(limit))
+    except (OSError, ValueError):
+        pass
+    return memory
+
+def rss_bytes():
+    """Current resident set size of this process (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+def _env_bool(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.lower() in ('1', 'true', 'yes', 'on')
+
+def _env_int(name):
+    value = os.getenv(name)
+    return int(value) if value and value != 'auto' else None
+
+def load_settings(argv=None):
+    """Read model loading settings from the command line, falling back to environment variables.
+
+    n_threads and n_ctx are sized from the host when left unset: threads are split
+    evenly across workers, and the context is the largest power of two (2k-32k) whose
+    KV cache fits in half of the memory left per worker after the model weights.
+    """
+    parser = argparse.ArgumentParser(description='Gradio chat demo for a GGUF model served by llama.cpp.')
+    parser.add_argument('--model-path', default=os.getenv('MODEL_PATH', 'model.gguf'), help='GGUF model file (env MODEL_PATH, default: model.gguf)')
+    parser.add_argument('--workers', type=int, default=int(os.getenv('WORKERS', '1')), help='Model worker processes (env WORKERS, default: 1)')
+    parser.add_argument('--n-threads', type=int, default=_env_int('N_THREADS'), help='Threads per worker (env N_THREADS, default: CPUs / workers)')
+    parser.add_argument('--n-ctx', type=int, default=_env_int('N_CTX'), help='Context size (env N_CTX, default: sized from free memory)')
+    parser.add_argument('--n-batch', type=int, default=int(os.getenv('N_BATCH', '512')), help='Prompt evaluation batch size (env N_BATCH, default: 512)')
+    parser.add_argument('--kv-type', choices=sorted(KV_TYPES), default=os.getenv('KV_TYPE', 'f16'), help='KV cache type (env KV_TYPE, default: f16)')
+    parser.add_argument('--kv-bytes-per-token', type=int, default=int(os.getenv('KV_BYTES_PER_TOKEN', str(800 << 10))), help='f16 KV cache bytes per token of context, used for n_ctx sizing (env KV_BYTES_PER_TOKEN, default: 800 KiB, about a 14B model)')
+    parser.add_argument('--no-mmap', dest='use_mmap', action='store_false', default=_env_bool('USE_MMAP', True), help='Read the weights into memory instead of mapping the file (env USE_MMAP=0)')
+    parser.add_argument('--mlock', dest='use_mlock', action='store_true', default=_env_bool('USE_MLOCK', False), help='Lock the weights in RAM (env USE_MLOCK=1)')
+    parser.add_argument('--prompt-cache-mb', type=int, default=int(os.getenv('PROMPT_CACHE_MB', '2048')), help='Per-worker RAM for cached prompt states, 0 disables (env PROMPT_CACHE_MB, default: 2048)')
+    parser.add_argument('--stream-interval', type=float, default=float(os.getenv('STREAM_INTERVAL', '0.05')), help='Seconds between UI updates while streaming (env STREAM_INTERVAL, default: 0.05)')
+    parser.add_argument('--max-tokens', type=int, default=int(os.getenv('MAX_TOKENS', '1024')), help='Upper bound on generated tokens per request (env MAX_TOKENS, default: 1024)')
+    parser.add_argument('--request-timeout', type=float, default=float(os.getenv('REQUEST_TIMEOUT', '300')), help='Seconds a request may queue and generate before it is cancelled (env REQUEST_TIMEOUT, default: 300)')
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', '7860')), help='HTTP port for the UI and the /v1 API (env PORT, default: 7860)')
+    settings = parser.parse_args(argv)
+
+    settings.cpus = host_cpus()
+    settings.memory = host_memory_bytes()
+    if settings.n_threads is None:
+        settings.n_threads = max(1, settings.cpus // settings.workers)
+    # Size the context for the cache type the workers will really get
+    settings.kv_type = effective_kv_type(settings.kv_type)
+    if settings.n_ctx is None:
+        settings.n_ctx = auto_n_ctx(settings)
+    return settings
+
+def auto_n_ctx(settings):
+    model_bytes = os.path.getsize(settings.model_path) if os.path.exists(settings.model_path) else 0
+    # Mapped weights are shared between the worker processes through the page cache
+    weights = model_bytes if settings.use_mmap else model_bytes * settings.workers
+    free_per_worker = (settings.memory - weights) / settings.workers - (settings.prompt_cache_mb << 20)
+    kv_bytes_per_token = settings.kv_bytes_per_token * KV_TYPE_SCALE[settings.kv_type]
+    n_ctx = 2048
+    while n_ctx < 32768 and n_ctx * 2 * kv_bytes_per_token <= free_per_worker / 2:
+        n_ctx *= 2
+    return n_ctx
+
+def model_kwargs(settings, chat_format):
+    """Keyword arguments for the Llama instance in each worker."""
+    return dict(model_path=settings.model_path,
+                n_ctx=settings.n_ctx,
+                n_threads=settings.n_threads,
+                n_batch=settings.n_batch,
+                use_mmap=settings.use_mmap,
+                use_mlock=settings.use_mlock,
+                kv_type=settings.kv_type,
+                chat_format=chat_format)
+
+def effective_kv_type(kv_type, llama_class=None):
+    """The KV cache type the installed llama-cpp-python will use when `kv_type` is asked for.
+
+    Releases without `type_k` (such as the pinned 0.1.80) cannot quantize the
+    cache, so a quantized type falls back to f16 with a warning.
+    """
+    if not kv_type.startswith('q'):
+        return kv_type
+    if llama_class is None:
+        try:
+            from llama_cpp import Llama as llama_class
+        except ImportError:
+            return kv_type
+    if 'type_k' in inspect.signature(llama_class.__init__).parameters:
+        return kv_type
+    print(f"Warning: this llama-cpp-python cannot quantize the KV cache (no type_k), using f16 instead of {kv_type}",
+          file=sys.stderr, flush=True)
+    return 'f16'
+
+def llama_kwargs(llama_class, kwargs):
+    """Translate the kv_type setting into what the installed llama-cpp-python accepts."""
+    kwargs = dict(kwargs)
+    kv_type = effective_kv_type(kwargs.pop('kv_type', 'f16'), llama_class)
+    parameters = inspect.signature(llama_class.__init__).parameters
+    if 'type_k' in parameters:
+        kwargs['type_k'] = kwargs['type_v'] = KV_TYPES[kv_type]
+        if kv_type.startswith('q') and 'flash_attn' in parameters:
+            # llama.cpp only supports a quantized V cache with flash attention
+            kwargs['flash_attn'] = True
+    elif 'f16_kv' in parameters:
+        # Older releases only choose between f16 and f32
+        kwargs['f16_kv'] = kv_type != 'f32'
+    return kwargs
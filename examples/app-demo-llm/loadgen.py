@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+def run_request(url, prompt, max_tokens):
+    """Send one streaming chat completion and return (time to first token, total latency, tokens, error)."""
+    payload = {
+        "messages": [{"role": "user", "content": prompt}],
+        "max_tokens": max_tokens,
+        "stream": True,
+    }
+    request = urllib.request.Request(url, data=json.dumps(payload).encode('utf-8'),
+                                     headers={"Content-Type": "application/json"})
+    start = time.perf_counter()
+    first_token = None
+    tokens = 0
+    try:
+        with urllib.request.urlopen(request) as response:
+            for line in response:
+                line = line.decode('utf-8').strip()
+                if not line.startswith('data: ') or line == 'data: [DONE]':
+                    continue
+                chunk = json.loads(line[len('data: '):])
+                if 'error' in chunk:
+                    return first_token, time.perf_counter() - start, tokens, chunk['error']['message']
+                if chunk['choices'][0]['delta'].get('content'):
+                    tokens += 1
+                    if first_token is None:
+                        first_token = time.perf_counter() - start
+    except Exception as e:
+        return first_token, time.perf_counter() - start, tokens, str(e)
+    return first_token, time.perf_counter() - start, tokens, None
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+def main():
+    parser = argparse.ArgumentParser(description='Load generator for the app-demo-llm /v1/chat/completions endpoint.')
+    parser.add_argument('-u', '--url', default='http://localhost:7860/v1/chat/completions', help='Chat completions URL (default: http://localhost:7860/v1/chat/completions)')
+    parser.add_argument('-c', '--concurrency', type=int, default=4, help='Concurrent clients (default: 4)')
+    parser.add_argument('-n', '--requests', type=int, default=16, help='Total requests (default: 16)')
+    parser.add_argument('-p', '--prompt', default='How to diagnose CHF?', help='Prompt sent by every client')
+    parser.add_argument('--max-tokens', type=int, default=128, help='max_tokens per request (default: 128)')
+    args = parser.parse_args()
+
+    lock = threading.Lock()
+    results = []
+
+    def client(_):
+        result = run_request(args.url, args.prompt, args.max_tokens)
+        with lock:
+            results.append(result)
+            print(f"[{len(results)}/{args.requests}] latency {result[1]:.2f}s, {result[2]} tokens" + (f", error: {result[3]}" if result[3] else ""))
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        list(executor.map(client, range(args.requests)))
+    elapsed = time.perf_counter() - start
+
+    ok = [r for r in results if r[3] is None]
+    latencies = [r[1] for r in ok]
+    first_tokens = [r[0] for r in ok if r[0] is not None]
+    tokens = sum(r[2] for r in ok)
+    print(f"\n{len(ok)}/{len(results)} requests succeeded in {elapsed:.1f}s at concurrency {args.concurrency}")
+    print(f"Throughput: {len(ok) / elapsed:.2f} req/s, {tokens / elapsed:.1f} tokens/s")
+    print(f"Latency: p50 {percentile(latencies, 50):.2f}s, p95 {percentile(latencies, 95):.2f}s")
+    print(f"Time to first token: p50 {percentile(first_tokens, 50):.2f}s, p95 {percentile(first_tokens, 95):.2f}s")
+
+if __name__ == "__main__":
+    main()
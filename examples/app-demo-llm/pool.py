@@ -0,0 +1,344 @@
+import hashlib
+import itertools
+import multiprocessing as mp
+import multiprocessing.connection
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from config import llama_kwargs, rss_bytes
+
+def session_key(messages, session=None):
+    """Identify a conversation by the client session (e.g. the Gradio session) plus its system prompt and first user message.
+
+    Without a client session, different users asking the same opening question share
+    a key, so a stored cut is only reused when the conversation still matches it.
+    """
+    system = next((m['content'] for m in messages if m['role'] == 'system'), '')
+    first_message = next((m['content'] for m in messages if m['role'] == 'user'), '')
+    return hashlib.sha1(f"{session or ''}\0{system}\0{first_message}".encode('utf-8')).hexdigest()
+
+def message_hash(message):
+    return hashlib.sha1(f"{message['role']}\0{message['content']}".encode('utf-8')).hexdigest()
+
+def fit_context(messages, count_tokens, budget, previous=None):
+    """Drop the oldest user/assistant turns until the conversation fits in `budget` tokens.
+
+    `previous` is the (dropped turns, hash of the first kept message) cut made on an
+    earlier turn of the same session. It is kept when the conversation is over budget
+    and still has that message at the cut, so the kept prefix, and the cached model
+    state for it, stays the same for the next turns; a conversation that fits is
+    never cut. When more has to go, the history is cut down to 3/4 of the budget.
+    Returns the kept messages and the new cut, or None when nothing was dropped.
+    """
+    system, turns = messages[:1], messages[1:]
+    # Rough per-message allowance for the chat template tokens around each content
+    costs = [count_tokens(message['content']) + 8 for message in turns]
+    system_cost = sum(count_tokens(message['content']) + 8 for message in system)
+    if system_cost + sum(costs) <= budget:
+        return messages, None
+    last = len(turns) - 1
+    start = 0
+    if previous is not None:
+        dropped, first_kept = previous
+        # Same key but a different conversation (another user, or a restarted chat): start over
+        if dropped * 2 <= last and message_hash(turns[dropped * 2]) == first_kept:
+            start = dropped * 2
+    if system_cost + sum(costs[start:]) > budget:
+        target = budget * 3 // 4
+        while start < last and system_cost + sum(costs[start:]) > target:
+            start += 2
+    if start == 0:
+        return messages, None
+    return system + turns[start:], (start // 2, message_hash(turns[start]))
+
+def _worker(worker_id, model_kwargs, prompt_cache_bytes, max_sessions, requests, results, cancel):
+    """Load one Llama instance and serve chat requests from this worker's queue.
+
+    Output goes back over this worker's own pipe: a worker killed halfway through
+    a write can then only break its own channel, not the other workers'.
+    """
+    # Imported here so only the worker processes load llama.cpp
+    from llama_cpp import Llama, LlamaRAMCache
+
+    load_start = time.perf_counter()
+    rss_before = rss_bytes()
+    llm = Llama(**llama_kwargs(Llama, model_kwargs))
+    print(f"[worker {worker_id}] model loaded in {time.perf_counter() - load_start:.1f}s, "
+          f"RSS {rss_before >> 20} MB -> {rss_bytes() >> 20} MB (n_ctx={llm.n_ctx()}, n_threads={model_kwargs.get('n_threads')})",
+          flush=True)
+    if prompt_cache_bytes:
+        # Keeps evaluated KV states keyed by token prefix, so a follow-up turn only evaluates the new tokens
+        llm.set_cache(LlamaRAMCache(capacity_bytes=prompt_cache_bytes))
+    budget = llm.n_ctx() - min(1024, llm.n_ctx() // 4)
+    count_tokens = lambda text: len(llm.tokenize(text.encode('utf-8'), add_bos=False))
+    cuts = OrderedDict()
+    results.send((None, 'ready', worker_id))
+    while True:
+        job = requests.get()
+        if job is None:
+            break
+        request_id, key, messages, options = job
+        try:
+            messages, cut = fit_context(messages, count_tokens, budget, cuts.get(key))
+            if cut is None:
+                cuts.pop(key, None)
+            else:
+                cuts[key] = cut
+                cuts.move_to_end(key)
+                if len(cuts) > max_sessions:
+                    cuts.popitem(last=False)
+            finish_reason = None
+            for chunk in llm.create_chat_completion(messages=messages, stream=True, **options):
+                if cancel.value == request_id:
+                    finish_reason = 'cancelled'
+                    break
+                choice = chunk['choices'][0]
+                if 'content' in choice['delta']:
+                    results.send((request_id, 'delta', choice['delta']['content']))
+                finish_reason = choice.get('finish_reason') or finish_reason
+            results.send((request_id, 'done', finish_reason or 'stop'))
+        except Exception as e:
+            results.send((request_id, 'error', f"worker {worker_id}: {e}"))
+
+class Worker:
+    def __init__(self, worker_id, context, model_kwargs, prompt_cache_bytes, max_sessions):
+        self.worker_id = worker_id
+        self.spawn_args = (context, model_kwargs, prompt_cache_bytes, max_sessions)
+        self.requests = context.Queue()
+        self.results, results = context.Pipe(duplex=False)
+        # Id of the request this worker should stop generating, checked between tokens
+        self.cancel = context.Value('q', -1, lock=False)
+        self.process = context.Process(target=_worker, daemon=True,
+                                       args=(worker_id, model_kwargs, prompt_cache_bytes, max_sessions, self.requests, results, self.cancel))
+        self.child_results = results
+        self.ready = False
+        self.current = None
+        self.served = 0
+
+    @property
+    def idle(self):
+        return self.current is None
+
+    def start(self):
+        self.process.start()
+        # Only the worker writes to the pipe, so reads see EOF once it is gone
+        self.child_results.close()
+
+    def respawn(self):
+        """A fresh worker process with the same id and settings, not started yet."""
+        worker = Worker(self.worker_id, *self.spawn_args)
+        worker.served = self.served
+        return worker
+
+class ModelPool:
+    """A pool of model worker processes, each with its own Llama instance.
+
+    Requests wait in a single scheduler queue and are handed to the first idle
+    worker as soon as it frees up; a chat session goes back to the worker that
+    served its previous turn when that worker is idle, so its conversation prefix
+    is still warm there. llama.cpp decodes one sequence per instance, so the
+    workers are the unit of batching.
+
+    Requests only go to workers that have loaded their model. A worker process
+    that dies fails its in-flight request; it is restarted when it had loaded
+    the model before (e.g. killed for memory) and dropped from the pool when it
+    never did, since loading would fail again.
+    """
+
+    def __init__(self, workers, model_kwargs, prompt_cache_bytes=0, max_sessions=1024):
+        context = mp.get_context('spawn')
+        self.workers = [Worker(i, context, model_kwargs, prompt_cache_bytes, max_sessions) for i in range(workers)]
+        self.pending = deque()
+        self.streams = {}
+        self.affinity = OrderedDict()
+        self.max_sessions = max_sessions
+        self.lock = threading.Lock()
+        self.request_ids = itertools.count()
+        self.queue_waits = deque(maxlen=500)
+        self.latencies = deque(maxlen=500)
+        self.started = {}
+        self.restarts = 0
+
+    def start(self):
+        for worker in self.workers:
+            worker.start()
+        threading.Thread(target=self._collect, daemon=True).start()
+
+    def chat(self, messages, max_tokens=None, timeout=None, session=None, sampling=None):
+        """Queue a chat completion and yield its content deltas as the worker produces them.
+
+        `session` identifies the client conversation (e.g. the Gradio session hash)
+        for worker affinity and history trimming.
+
+        `sampling` holds extra create_chat_completion arguments such as
+        temperature, top_p or stop.
+
+        Generation stops after `max_tokens` tokens; TimeoutError is raised once
+        `timeout` seconds have passed since the request was queued, and the
+        worker is told to stop. RuntimeError is raised when the worker fails or
+        exits mid-request. Returns the finish reason when exhausted.
+        """
+        request_id = next(self.request_ids)
+        options = dict(sampling or {}, max_tokens=max_tokens)
+        stream = queue.Queue()
+        with self.lock:
+            if not self.workers:
+                raise RuntimeError("no model workers left")
+            self.streams[request_id] = stream
+            self.pending.append((request_id, session_key(messages, session), messages, options, time.perf_counter()))
+            self._dispatch()
+
+        deadline = time.perf_counter() + timeout if timeout else None
+        finished = False
+        try:
+            while True:
+                remaining = deadline - time.perf_counter() if deadline else None
+                try:
+                    kind, data = stream.get(timeout=max(remaining, 0) if deadline else None)
+                except queue.Empty:
+                    raise TimeoutError(f"request timed out after {timeout}s")
+                if kind == 'delta':
+                    yield data
+                elif kind == 'done':
+                    finished = True
+                    return data
+                else:
+                    finished = True
+                    raise RuntimeError(data)
+        finally:
+            if not finished:
+                # Timed out, or the caller stopped reading (e.g. the client disconnected)
+                self._cancel(request_id)
+
+    def _cancel(self, request_id):
+        with self.lock:
+            queued = [job for job in self.pending if job[0] == request_id]
+            if queued:
+                self.pending.remove(queued[0])
+                self.streams.pop(request_id, None)
+                return
+            for worker in self.workers:
+                if worker.current == request_id:
+                    worker.cancel.value = request_id
+
+    def _dispatch(self):
+        # Called with self.lock held
+        while self.pending:
+            idle = [worker for worker in self.workers if worker.idle and worker.ready]
+            if not idle:
+                return
+            request_id, key, messages, options, enqueued_at = self.pending.popleft()
+            preferred = self.affinity.get(key)
+            worker = next((w for w in idle if w.worker_id == preferred), None)
+            if worker is None:
+                worker = min(idle, key=lambda w: w.served)
+            worker.current = request_id
+            worker.served += 1
+            self.affinity[key] = worker.worker_id
+            self.affinity.move_to_end(key)
+            if len(self.affinity) > self.max_sessions:
+                self.affinity.popitem(last=False)
+            now = time.perf_counter()
+            self.queue_waits.append(now - enqueued_at)
+            self.started[request_id] = enqueued_at
+            worker.requests.put((request_id, key, messages, options))
+
+    def _collect(self):
+        """Route worker output to the waiting streams, hand freed workers the next request and replace dead ones."""
+        while True:
+            with self.lock:
+                channels = {worker.results: worker for worker in self.workers}
+                channels.update((worker.process.sentinel, worker) for worker in self.workers)
+            for channel in mp.connection.wait(list(channels)):
+                worker = channels[channel]
+                if channel is worker.results:
+                    self._receive(worker)
+            self._check_workers()
+
+    def _receive(self, worker):
+        # Drain everything the worker sent, also when it has exited since
+        try:
+            while worker.results.poll():
+                self._handle(worker, *worker.results.recv())
+        except (EOFError, OSError):
+            pass
+
+    def _handle(self, worker, request_id, kind, data):
+        with self.lock:
+            if kind == 'ready':
+                worker.ready = True
+                self._dispatch()
+                return
+            stream = self.streams.get(request_id)
+            if kind in ('done', 'error'):
+                if worker.current == request_id:
+                    worker.current = None
+                self.streams.pop(request_id, None)
+                started = self.started.pop(request_id, None)
+                if started is not None:
+                    self.latencies.append(time.perf_counter() - started)
+                self._dispatch()
+        if stream is not None:
+            stream.put((kind, data))
+
+    def _check_workers(self):
+        """Fail the requests of dead workers, restart or drop those workers and hand out the queue again."""
+        if not threading.main_thread().is_alive():
+            # Interpreter shutdown terminates the workers, do not bring them back
+            return
+        failed = []
+        with self.lock:
+            for worker in list(self.workers):
+                if worker.process.is_alive():
+                    continue
+                worker.process.join()
+                reason = f"worker {worker.worker_id} exited with code {worker.process.exitcode}"
+                if worker.current is not None:
+                    failed.append((self.streams.pop(worker.current, None), reason))
+                    self.started.pop(worker.current, None)
+                index = self.workers.index(worker)
+                if worker.ready:
+                    print(f"[pool] {reason}, restarting it", flush=True)
+                    self.workers[index] = replacement = worker.respawn()
+                    replacement.start()
+                    self.restarts += 1
+                else:
+                    print(f"[pool] {reason} before loading the model, removing it from the pool", flush=True)
+                    del self.workers[index]
+                worker.results.close()
+            if not self.workers:
+                # Nothing is left to serve the queue
+                while self.pending:
+                    failed.append((self.streams.pop(self.pending.popleft()[0], None), "no model workers left"))
+            self._dispatch()
+        for stream, reason in failed:
+            if stream is not None:
+                stream.put(('error', reason))
+
+    def stats(self):
+        with self.lock:
+            return {
+                "workers": len(self.workers),
+                "ready": sum(worker.ready for worker in self.workers),
+                "restarts": self.restarts,
+                "busy": sum(not worker.idle for worker in self.workers),
+                "queue_depth": len(self.pending),
+                "queue_wait_p50": _percentile(self.queue_waits, 50),
+                "queue_wait_p95": _percentile(self.queue_waits, 95),
+                "latency_p50": _percentile(self.latencies, 50),
+                "latency_p95": _percentile(self.latencies, 95),
+            }
+
+    def status_markdown(self):
+        s = self.stats()
+        return (f"**Workers** {s['busy']} busy / {s['ready']} ready / {s['workers']} total  \n"
+                f"**Queue depth** {s['queue_depth']}  \n"
+                f"**Queue wait** p50 {s['queue_wait_p50']:.2f}s, p95 {s['queue_wait_p95']:.2f}s  \n"
+                f"**Request latency** p50 {s['latency_p50']:.2f}s, p95 {s['latency_p95']:.2f}s")
+
+def _percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from mock_ollama import start_server
+
+SOURCES_DIR = os.path.dirname(os.path.abspath(__file__))
+EXAMPLES_DIR = os.path.dirname(os.path.dirname(SOURCES_DIR))
+RAG_DIR = os.path.join(EXAMPLES_DIR, 'rag-langchain')
+WHISPER_DIR = os.path.join(EXAMPLES_DIR, 'whisper.cpp')
+
+# The example classes live in the llm_insights package next to the RAG scripts
+sys.path.insert(0, os.path.join(RAG_DIR, 'sources'))
+
+# ChatDocument instances are not thread-safe and in-memory Chroma clients share
+# one process-wide store, so these scenarios always run on a single caller
+SERIAL_SCENARIOS = {'ChatPDF.ingest'}
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+def peak_rss_mb():
+    """Peak RSS of this process and of its finished children, in MB."""
+    scale = 1 if sys.platform == 'darwin' else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale
+    return own / 1e6, children / 1e6
+
+def measure(name, operation, iterations, concurrency):
+    """Run `operation` `iterations` times on `concurrency` threads and return latency and throughput figures."""
+    def timed(_):
+        start = time.perf_counter()
+        operation()
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    # The example classes print their answers, keep the report readable
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=concurrency) as executor:
+        latencies = list(executor.map(timed, range(iterations)))
+    elapsed = time.perf_counter() - start
+    own_rss, children_rss = peak_rss_mb()
+    return {
+        "scenario": name,
+        "iterations": iterations,
+        "concurrency": concurrency,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "throughput": iterations / elapsed,
+        "peak_rss_mb": round(own_rss, 1),
+        "peak_child_rss_mb": round(children_rss, 1),
+    }
+
+def scenarios(args):
+    """Yield (name, setup) pairs; setup returns the operation to measure."""
+    def chat_mode():
+        from llm_insights.chat import ChatMode
+        chat = ChatMode(model='mistral')
+        return lambda: chat.get_response(args.question)
+
+    def chat_image():
+        from llm_insights.images import ChatImage
+        chat = ChatImage(model='llava:13b')
+        chat.load_image(os.path.join(RAG_DIR, 'reference', 'paper.jpg'))
+        return lambda: chat.get_response(args.question)
+
+    def chat_pdf_ingest():
+        from llm_insights.documents import ChatDocument
+        def ingest():
+            # A fresh index per call, so every iteration ingests into an empty store
+            chat = ChatDocument(model='mistral')
+            try:
+                chat.ingest(os.path.join(RAG_DIR, 'reference', 'paper.pdf'))
+            finally:
+                chat.clear()
+        return ingest
+
+    def chat_pdf_ask():
+        from llm_insights.documents import ChatDocument
+        chat = ChatDocument(model='mistral')
+        chat.ingest(os.path.join(RAG_DIR, 'reference', 'paper.pdf'))
+        return lambda: chat.ask(args.question)
+
+    def audio():
+        from llm_insights.audio import AudioTranscriber
+        model_file = tempfile.NamedTemporaryFile(suffix='.bin', delete=False)
+        model_file.close()
+        transcriber = AudioTranscriber(os.path.join(SOURCES_DIR, 'fake-whisper') + os.sep, model_file.name)
+        return lambda: transcriber.process_audio(os.path.join(WHISPER_DIR, 'samples', 'jfk.wav'))
+
+    yield 'ChatMode.get_response', chat_mode
+    yield 'ChatImage.get_response', chat_image
+    yield 'ChatPDF.ingest', chat_pdf_ingest
+    yield 'ChatPDF.ask', chat_pdf_ask
+    yield 'AudioTranscriber.process_audio', audio
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline latency benchmark for the example apps against a mock Ollama server and a fake whisper binary.')
+    parser.add_argument('-n', '--iterations', type=int, default=20, help='Calls per scenario (default: 20)')
+    parser.add_argument('-c', '--concurrency', type=int, default=1, help='Concurrent callers per scenario (default: 1)')
+    parser.add_argument('-s', '--scenario', action='append', help='Only run scenarios whose name contains this text (repeatable)')
+    parser.add_argument('-q', '--question', default='what does this paper mainly talk about?', help='Question sent in every call')
+    parser.add_argument('--first-token-latency', type=float, default=0.2, help='Mock seconds before the first token (default: 0.2)')
+    parser.add_argument('--token-latency', type=float, default=0.02, help='Mock seconds between tokens (default: 0.02)')
+    parser.add_argument('--tokens', type=int, default=32, help='Mock tokens per response (default: 32)')
+    parser.add_argument('--json', help='Also write the results to this JSON file')
+    args = parser.parse_args()
+
+    server = start_server(first_token_latency=args.first_token_latency, token_latency=args.token_latency, tokens=args.tokens)
+    os.environ['OLLAMA_HOST'] = server.url
+    print(f"Mock Ollama on {server.url}")
+
+    results = []
+    for name, setup in scenarios(args):
+        if args.scenario and not any(pattern in name for pattern in args.scenario):
+            continue
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                operation = setup()
+        except ImportError as e:
+            print(f"{name}: skipped, missing dependency ({e})")
+            continue
+        concurrency = 1 if name in SERIAL_SCENARIOS else args.concurrency
+        results.append(measure(name, operation, args.iterations, concurrency))
+
+    print(f"\n{'scenario':<34}{'p50 s':>8}{'p95 s':>8}{'ops/s':>8}{'rss MB':>9}{'child MB':>10}")
+    for r in results:
+        print(f"{r['scenario']:<34}{r['p50']:>8.3f}{r['p95']:>8.3f}{r['throughput']:>8.2f}{r['peak_rss_mb']:>9.1f}{r['peak_child_rss_mb']:>10.1f}")
+    print(f"\nMock server handled {len(server.requests)} model requests")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
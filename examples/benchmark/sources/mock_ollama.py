@@ -0,0 +1,150 @@
+#!/usr/bin/env python
+
+import argparse
+import hashlib
+import json
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+WORDS = "the patient presented with chest pain and shortness of breath after exertion".split()
+
+class MockOllamaHandler(BaseHTTPRequestHandler):
+    """Answers /api/generate and /api/chat like Ollama, streaming NDJSON tokens with simulated latency."""
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/api/tags':
+            self._send_json({"models": [{"name": "mistral:latest"}, {"name": "llava:13b"}]})
+        elif self.path == '/':
+            self._send_json("Ollama is running")
+        else:
+            self.send_error(404)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length) or b'{}')
+        if self.path == '/api/generate':
+            self._generate(body, chat=False)
+        elif self.path == '/api/chat':
+            self._generate(body, chat=True)
+        elif self.path == '/api/embeddings':
+            self._send_json({"embedding": _embedding(body.get('prompt', ''))})
+        else:
+            self.send_error(404)
+
+    def _generate(self, body, chat):
+        config = self.server.config
+        self.server.record(body)
+        if chat:
+            prompt = "".join(message.get('content', '') for message in body.get('messages', []))
+        else:
+            prompt = body.get('prompt', '')
+        start = time.perf_counter()
+
+        # Prefill: a fixed cost plus a per-character cost for the prompt
+        prefill = config.first_token_latency + len(prompt) * config.prompt_char_latency
+        time.sleep(prefill)
+        tokens = [WORDS[i % len(WORDS)] + ' ' for i in range(config.tokens)]
+        if not prompt and not body.get('images'):
+            # An empty prompt only loads the model, like Ollama's keep_alive warm-up
+            tokens = []
+
+        def chunk(text, done):
+            data = {"model": body.get('model'), "created_at": datetime.now(timezone.utc).isoformat(), "done": done}
+            if chat:
+                data["message"] = {"role": "assistant", "content": text}
+            else:
+                data["response"] = text
+            if done:
+                data.update({
+                    "total_duration": int((time.perf_counter() - start) * 1e9),
+                    "prompt_eval_count": max(1, len(prompt) // 4),
+                    "prompt_eval_duration": int(prefill * 1e9),
+                    "eval_count": len(tokens),
+                    "eval_duration": int(len(tokens) * config.token_latency * 1e9),
+                })
+            return data
+
+        if body.get('stream', True):
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/x-ndjson')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            for token in tokens:
+                time.sleep(config.token_latency)
+                self._write_chunk(json.dumps(chunk(token, False)) + "\n")
+            self._write_chunk(json.dumps(chunk("", True)) + "\n")
+            self._write_chunk("")
+        else:
+            time.sleep(config.token_latency * len(tokens))
+            self._send_json(chunk("".join(tokens), True))
+
+    def _write_chunk(self, text):
+        data = text.encode('utf-8')
+        self.wfile.write(f"{len(data):x}\r\n".encode('ascii') + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, data):
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+class MockOllamaServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config):
+        super().__init__(address, MockOllamaHandler)
+        self.config = config
+        self.requests = []
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def record(self, body):
+        with self.lock:
+            self.requests.append({"model": body.get('model'), "images": len(body.get('images') or [])})
+
+def _embedding(text, dimensions=384):
+    """Deterministic pseudo-embedding so identical texts get identical vectors."""
+    digest = hashlib.sha256(text.encode('utf-8')).digest()
+    return [(digest[i % len(digest)] - 128) / 128 for i in range(dimensions)]
+
+def start_server(host='127.0.0.1', port=0, first_token_latency=0.2, token_latency=0.02, tokens=32, prompt_char_latency=0.0):
+    """Start a mock server in a background thread and return it; port 0 picks a free port."""
+    config = argparse.Namespace(first_token_latency=first_token_latency, token_latency=token_latency,
+                                tokens=tokens, prompt_char_latency=prompt_char_latency)
+    server = MockOllamaServer((host, port), config)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description='Mock Ollama server that streams tokens with configurable latency.')
+    parser.add_argument('-p', '--port', type=int, default=11435, help='Port to listen on (default: 11435)')
+    parser.add_argument('--first-token-latency', type=float, default=0.2, help='Seconds before the first token (default: 0.2)')
+    parser.add_argument('--prompt-char-latency', type=float, default=0.0, help='Extra prefill seconds per prompt character (default: 0)')
+    parser.add_argument('--token-latency', type=float, default=0.02, help='Seconds between tokens (default: 0.02)')
+    parser.add_argument('--tokens', type=int, default=32, help='Tokens per response (default: 32)')
+    args = parser.parse_args()
+
+    server = start_server(port=args.port, first_token_latency=args.first_token_latency, token_latency=args.token_latency,
+                          tokens=args.tokens, prompt_char_latency=args.prompt_char_latency)
+    print(f"Mock Ollama listening on {server.url}, use OLLAMA_HOST={server.url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
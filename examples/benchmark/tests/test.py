@@ -0,0 +1,45 @@
+import json
+import os
+import subprocess
+import sys
+import unittest
+import urllib.request
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sources'))
+from mock_ollama import start_server
+
+class TestMockOllama(unittest.TestCase):
+    def setUp(self):
+        self.server = start_server(first_token_latency=0.0, token_latency=0.0, tokens=5)
+
+    def tearDown(self):
+        self.server.shutdown()
+
+    def post(self, path, payload):
+        request = urllib.request.Request(self.server.url + path, data=json.dumps(payload).encode('utf-8'))
+        with urllib.request.urlopen(request) as response:
+            return [json.loads(line) for line in response.read().decode('utf-8').splitlines() if line]
+
+    def test_generate_streams_tokens_then_stats(self):
+        chunks = self.post('/api/generate', {"model": "mistral", "prompt": "hello"})
+        self.assertEqual(len(chunks), 6)
+        self.assertFalse(chunks[0]["done"])
+        self.assertTrue(chunks[-1]["done"])
+        self.assertEqual(chunks[-1]["eval_count"], 5)
+
+    def test_chat_without_streaming(self):
+        chunks = self.post('/api/chat', {"model": "mistral", "stream": False, "messages": [{"role": "user", "content": "hi"}]})
+        self.assertEqual(len(chunks), 1)
+        self.assertEqual(len(chunks[0]["message"]["content"].split()), 5)
+
+class TestFakeWhisper(unittest.TestCase):
+    def test_prints_transcript(self):
+        script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sources', 'fake-whisper', 'main')
+        audio_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'whisper.cpp', 'samples', 'jfk.wav')
+        result = subprocess.run([sys.executable, script_path, '-m', 'model.bin', '-f', audio_path, '-oj'],
+                                capture_output=True, text=True, env=dict(os.environ, FAKE_WHISPER_LATENCY='0'))
+        self.assertEqual(result.returncode, 0)
+        self.assertIn("ask not what your country can do for you", result.stdout)
+
+if __name__ == '__main__':
+    unittest.main()
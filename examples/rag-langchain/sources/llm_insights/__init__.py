@@ -0,0 +1,31 @@
+"""Shared building blocks for the Ollama example CLIs: document, image, chat and audio helpers.
+
+Submodules are imported on first attribute access, so e.g. AudioTranscriber
+can be used without LangChain installed.
+"""
+
+import importlib
+
+_EXPORTS = {
+    'ChatDocument': 'documents',
+    'ChatPDF': 'documents',
+    'DOCUMENT_PROMPT': 'documents',
+    'PAPER_PROMPT': 'documents',
+    'ChatImage': 'images',
+    'ChatMode': 'chat',
+    'AudioTranscriber': 'audio',
+    'MixedMediaIngest': 'ingest',
+    'PrefetchSession': 'prefetch',
+    'ModelRouter': 'routing',
+    'sniff_kind': 'filetypes',
+    'ImageCache': 'image_cache',
+    'generate': 'client',
+    'tracer': 'tracing',
+}
+
+__all__ = list(_EXPORTS)
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return getattr(importlib.import_module(f".{_EXPORTS[name]}", __name__), name)
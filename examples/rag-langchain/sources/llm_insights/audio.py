@@ -0,0 +1,109 @@
+import os
+import re
+import subprocess
+import sys
+from .filetypes import audio_format
+
+TIMESTAMP = re.compile(r'^\s*\[[\d:.]+ --> [\d:.]+\]')
+
+class AudioTranscriber:
+    def __init__(self, whisper_exe_path, model_path):
+        self.whisper_exe_path = whisper_exe_path
+        self.model_path = model_path
+
+    def convert_to_wav(self, audio_file_path):
+        # Construct the command to convert the audio to the 16 kHz mono WAV whisper expects, using ffmpeg
+        wav_file_path = os.path.splitext(audio_file_path)[0] + '.wav'
+        if wav_file_path == audio_file_path:
+            # Misnamed file, e.g. an mp3 saved as .wav: do not overwrite the input
+            wav_file_path = os.path.splitext(audio_file_path)[0] + '.16k.wav'
+        command = [
+            'ffmpeg',
+            '-i', audio_file_path,
+            '-acodec', 'pcm_s16le',
+            '-ar', '16000',
+            '-ac', '1',
+            wav_file_path
+        ]
+
+        # Run the command to convert the audio file
+        result = subprocess.run(command, capture_output=True, text=True)
+
+        if result.returncode == 0:
+            print(f"Successfully converted {audio_file_path} to {wav_file_path}")
+            return wav_file_path
+        else:
+            print("Error converting audio:", result.stderr, file=sys.stderr)
+            return None
+
+    # The converter started out handling mp3 only
+    convert_mp3_to_wav = convert_to_wav
+
+    def transcribe_audio(self, audio_file_path, output_format='text', echo=True):
+        """Run whisper on the file and return its output, or None on failure."""
+        # Construct the command to run the Whisper CLI
+        command = [
+            self.whisper_exe_path + 'main',
+            '-m', self.model_path,
+            '-f', audio_file_path,
+            '-oj',  # Output the result in a JSON file
+        ]
+
+        # Run the command and capture the output
+        result = subprocess.run(command, capture_output=True, text=True)
+
+        if result.returncode == 0:
+            if echo:
+                print(result.stdout)
+            return result.stdout
+        else:
+            print("Error transcribing audio:", result.stderr, file=sys.stderr)
+            return None
+
+    @staticmethod
+    def download_model():
+        print("To download the model, follow these steps:")
+        print("1. Clone OpenAI whisper and whisper.cpp:")
+        print("   git clone https://github.com/openai/whisper")
+        print("   git clone https://github.com/ggerganov/whisper.cpp")
+        print("2. Navigate to the models directory:")
+        print("   cd whisper.cpp/models")
+        print("3. Clone the model repositories:")
+        print("   git clone https://huggingface.co/distil-whisper/distil-medium.en")
+        print("   git clone https://huggingface.co/distil-whisper/distil-large-v2")
+        print("4. Convert the models to ggml format:")
+        print("   python3 ./convert-h5-to-ggml.py ./distil-medium.en/ ../../whisper .")
+        print("   mv ggml-model.bin ggml-medium.en-distil.bin")
+        print("   python3 ./convert-h5-to-ggml.py ./distil-large-v2/ ../../whisper .")
+        print("   mv ggml-model.bin ggml-large-v2-distil.bin")
+        print("After completing these steps, you will have the models in the required format.")
+
+    def process_audio(self, audio_file_path, echo=True, file_format=None):
+        """Transcribe an audio file and return the transcript, or None on failure.
+
+        Anything that is not a RIFF/WAVE file by content (mp3, flac, ogg, whatever
+        its extension) is converted with ffmpeg first; `file_format` skips sniffing
+        when the caller already knows it.
+        """
+        # Check if the model file exists
+        if not os.path.exists(self.model_path):
+            print(f"Model file not found: {self.model_path}")
+            print("Please download the model first.")
+            self.download_model()
+            sys.exit(1)
+
+        file_format = file_format or audio_format(audio_file_path)
+        if file_format != 'wav':
+            # Convert to WAV
+            wav_file_path = self.convert_to_wav(audio_file_path)
+            if wav_file_path:
+                # Transcribe the converted WAV file
+                return self.transcribe_audio(wav_file_path, echo=echo)
+            return None
+        else:
+            # Transcribe the audio file directly
+            return self.transcribe_audio(audio_file_path, echo=echo)
+
+def strip_timestamps(transcript):
+    """Drop the `[00:00:00.000 --> 00:00:11.000]` prefixes whisper puts in front of every segment."""
+    return ' '.join(TIMESTAMP.sub('', line).strip() for line in transcript.splitlines() if line.strip())
@@ -0,0 +1,44 @@
+import subprocess
+from .client import generate
+
+class ChatMode:
+    def __init__(self, model='mistral', router=None):
+        self.model = model
+        # Optional ModelRouter: try a small model first and escalate to a large one when needed
+        self.router = router
+
+    def get_response(self, question):
+        """Send request to the Ollama API with the question and print the response."""
+        if self.router is not None:
+            answer = self.router.answer(question, lambda model: self._generate(question, model))
+        else:
+            answer = self._generate(question, self.model)
+        if answer is not None:
+            print("Response from the model:", answer)
+
+    def _generate(self, question, model):
+        json_response = generate(question, model=model)
+        return json_response.get("response") if json_response is not None else None
+
+    def interactive_mode(self):
+        """Handle interactive mode where the user can input multiple questions."""
+        print("Entering interactive mode. Type 'exit' to quit.")
+        while True:
+            question = input("Enter your question: ")
+            if question.lower() == 'exit':
+                break
+            else:
+                self.get_response(question=question)
+
+    def quick_mode(self, question):
+        """Handle quick mode where the user can input a single question."""
+        print("Quick mode: processing your question.")
+        self.get_response(question=question)
+
+    def ollama_mode(self):
+        """Start chat mode using `ollama run mistral`."""
+        print("Starting Ollama Mistral in chat mode...")
+        try:
+            subprocess.run(["ollama", "run", "mistral"], check=True)
+        except subprocess.CalledProcessError as e:
+            print(f"Failed to start Ollama Mistral in chat mode: {e}")
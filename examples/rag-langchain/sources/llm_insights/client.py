@@ -0,0 +1,87 @@
+import json
+import sys
+import time
+from .resources import OLLAMA_HOST, get_session
+from .tracing import tracer, ollama_stats
+
+# Times a request shed by the scheduler proxy (503 with Retry-After) is retried
+MAX_RETRIES = 5
+
+class Shed(RuntimeError):
+    """Raised for a batch request the scheduler proxy kept shedding after every retry."""
+
+def generate(prompt, model='mistral', images=None, priority='interactive', keep_alive=None, options=None, cancel=None):
+    """Send a non-streaming /api/generate request and return the parsed JSON response, or None on failure.
+
+    `priority` is 'interactive' or 'batch'; it is sent as the X-Priority header for
+    the scheduler proxy (ollama-scheduler.py) and ignored by a plain Ollama server.
+    An empty prompt only loads the model, for `keep_alive` (e.g. '30m').
+    A batch request that is still shed after MAX_RETRIES raises Shed, so batch
+    callers can tell work dropped by admission control from a failed request.
+    With a `cancel` event the response is streamed and abandoned as soon as the
+    event is set, which makes Ollama stop generating; None is returned then.
+    """
+    payload = {
+        "model": model,
+        "prompt": prompt,
+        "stream": cancel is not None,
+    }
+    if images:
+        payload["images"] = images
+    if keep_alive is not None:
+        payload["keep_alive"] = keep_alive
+    if options:
+        payload["options"] = options
+    api_url = f'{OLLAMA_HOST}/api/generate'
+    headers = {'X-Priority': priority}
+    with tracer.span('ollama.generate', model=model, images=len(images or []), priority=priority) as span:
+        for attempt in range(MAX_RETRIES + 1):
+            response = get_session().post(api_url, json=payload, headers=headers, stream=cancel is not None)
+            if response.status_code != 503 or 'Retry-After' not in response.headers or attempt == MAX_RETRIES:
+                break
+            # Shed by the scheduler: back off for as long as it asks
+            response.close()
+            time.sleep(float(response.headers['Retry-After']))
+        if response.status_code != 200:
+            json_response = {}
+        elif cancel is not None:
+            json_response = _read_stream(response, cancel)
+            if json_response is None:
+                span.set(status=response.status_code, retries=attempt, cancelled=True)
+                return None
+        else:
+            json_response = response.json()
+        span.set(status=response.status_code, retries=attempt, **ollama_stats(json_response))
+    if response.status_code == 503 and 'Retry-After' in response.headers:
+        message = f"Shed by the scheduler proxy after {MAX_RETRIES} retries: {_error_message(response)}"
+        if priority == 'batch':
+            raise Shed(message)
+        print(message, file=sys.stderr)
+        return None
+    if response.status_code != 200:
+        print(f"Failed to get a response from the model, status code: {response.status_code}", file=sys.stderr)
+        return None
+    return json_response
+
+def _error_message(response):
+    try:
+        return response.json().get("error", response.reason)
+    except ValueError:
+        return response.reason
+
+def _read_stream(response, cancel):
+    """Join a streamed /api/generate response into one like the non-streaming API returns, or None once `cancel` is set."""
+    parts = []
+    final = {}
+    try:
+        for line in response.iter_lines():
+            if cancel.is_set():
+                return None
+            if line:
+                final = json.loads(line)
+                parts.append(final.get("response", ""))
+    finally:
+        # Closing the connection early is what stops Ollama's generation
+        response.close()
+    final["response"] = "".join(parts)
+    return final
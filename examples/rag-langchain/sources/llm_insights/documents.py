@@ -0,0 +1,242 @@
+import os
+import shutil
+import tempfile
+import time
+import uuid
+from langchain_community.vectorstores import Chroma
+from langchain.schema.output_parser import StrOutputParser
+from langchain_community.document_loaders import PyPDFLoader, UnstructuredHTMLLoader, TextLoader
+from langchain.schema import Document
+from langchain.schema.runnable import RunnablePassthrough
+from langchain.prompts import PromptTemplate
+from langchain.vectorstores.utils import filter_complex_metadata
+from .filetypes import text_encoding
+from .resources import CHUNK_OVERLAP, CHUNK_SIZE, get_chat_model, get_embeddings, get_text_splitter
+from .streaming import iter_batches, iter_html_text, iter_text_blocks, split_stream
+from .tracing import tracer, traced, describe_documents, describe_message
+
+DOCUMENT_PROMPT = """
+            <s> [Instruction] You are an assistant tasked with answering questions based on the provided document. Utilize the context from the document to formulate your response. If the answer is not available within the document, indicate that the information is not available. Aim for responses that are direct, informative, and no longer than three sentences. [/Instruction] </s>
+            [Instruction] Question: {question}
+            Context: {context}
+            Answer: [/Instruction]
+        """
+
+PAPER_PROMPT = """
+            <s> [Instruction] You are a scientific assistant tasked with answering questions based on the provided scientific paper. Utilize the context from the paper to formulate your response. If the answer is not available within the document, indicate that the information is not available. Aim for responses that are direct, informative, and no longer than three sentences. [/Instruction] </s>
+            [Instruction] Question: {question}
+            Context: {context}
+            Answer: [/Instruction]
+        """
+
+DOCUMENT_EXTENSIONS = ('pdf', 'html', 'txt')
+
+# Text and HTML files above this size are streamed instead of loaded whole
+STREAM_THRESHOLD_BYTES = 32 * 1024 * 1024
+
+class ChatDocument:
+    """Question answering over one pdf, html or txt document.
+
+    The embedding model, the Ollama client and the text splitter are shared by
+    every instance in the process; each instance only owns its vector index.
+    """
+
+    def __init__(self, model='mistral', prompt=DOCUMENT_PROMPT, router=None):
+        self.vector_store = None
+        self.retriever = None
+        self.chain = None
+        # Temporary directory of an on-disk index, see use_disk_index
+        self.persist_directory = None
+        self.model_name = model
+        self.model = get_chat_model(model)
+        self.text_splitter = get_text_splitter()
+        self.prompt = PromptTemplate.from_template(prompt)
+        # Optional ModelRouter: try a small model first and escalate to a large one when needed
+        self.router = router
+
+    def load(self, file_path: str, file_type=None):
+        """Load a pdf, html or txt file into LangChain documents, by extension unless `file_type` is given."""
+        file_type = file_type or file_path.split('.')[-1].lower()
+        with tracer.span('load', file_type=file_type):
+            if file_type == 'pdf':
+                return PyPDFLoader(file_path=file_path).load()
+            elif file_type == 'html':
+                return UnstructuredHTMLLoader(file_path=file_path).load()
+            elif file_type == 'txt':
+                return TextLoader(file_path=file_path, encoding=text_encoding(file_path)).load()
+        raise ValueError(f"Unsupported file type: {file_type}")
+
+    def should_stream(self, file_path: str, file_type=None):
+        """Whether the file is a text or HTML file too large to load into memory at once."""
+        file_type = file_type or file_path.split('.')[-1].lower()
+        return file_type in ('txt', 'html') and os.path.getsize(file_path) > STREAM_THRESHOLD_BYTES
+
+    def stream_chunks(self, file_path: str, file_type=None, batch_size=256):
+        """Yield lists of at most `batch_size` split chunks, reading the file block by block.
+
+        Only one block of text and one batch of chunks are held at a time while
+        reading and splitting. Where the chunks end up is the index's business:
+        call use_disk_index first so their text is not kept in memory as well.
+        """
+        file_type = file_type or file_path.split('.')[-1].lower()
+        if file_type == 'html':
+            blocks = iter_html_text(file_path)
+        elif file_type == 'txt':
+            blocks = iter_text_blocks(file_path, encoding=text_encoding(file_path))
+        else:
+            raise ValueError(f"Unsupported file type for streaming: {file_type}")
+        chunks = (Document(page_content=chunk, metadata={'source': file_path})
+                  for chunk in split_stream(blocks, CHUNK_SIZE, CHUNK_OVERLAP))
+        yield from iter_batches(chunks, batch_size)
+
+    def use_disk_index(self):
+        """Keep the index in a temporary directory instead of the in-memory Chroma client.
+
+        Used for streamed files, so chunk texts and metadata live in SQLite on disk.
+        Chroma still holds the vector index itself in memory, about one embedding per
+        chunk. Has no effect once the index exists; clear() removes the directory.
+        """
+        if self.vector_store is None and self.persist_directory is None:
+            self.persist_directory = tempfile.mkdtemp(prefix='llm-insights-index-')
+
+    def ingest(self, file_path: str, file_type=None):
+        """Replace the index with the chunks of this one file; use add_documents to index several."""
+        self.clear()
+        try:
+            if self.should_stream(file_path, file_type):
+                self.use_disk_index()
+                with tracer.span('stream_ingest', file_type=file_type) as span:
+                    chunks = sum(self.add_chunks(batch) for batch in self.stream_chunks(file_path, file_type))
+                    span.set(chunks=chunks)
+                return
+            docs = self.load(file_path, file_type)
+        except ValueError:
+            self.clear()
+            return "Unsupported file type"
+        except Exception as e:
+            # A streamed ingest may have indexed part of the file; do not answer from it
+            self.clear()
+            return f"Failed to load document: {str(e)}"
+        self.add_documents(docs)
+
+    def add_documents(self, docs):
+        """Split the documents and add them to this instance's index, creating it on first use.
+
+        Can be called repeatedly to grow the index while other files are still loading.
+        Returns the number of chunks added.
+        """
+        with tracer.span('split', documents=len(docs)) as span:
+            chunks = self.text_splitter.split_documents(docs)
+            span.set(chunks=len(chunks))
+        return self.add_chunks(chunks)
+
+    def add_chunks(self, chunks, ids=None):
+        """Embed already split chunks into the index and return how many were added.
+
+        `ids` names the chunks, one per chunk, so they can be taken out again with delete_chunks.
+        """
+        chunks = filter_complex_metadata(chunks)
+        if not chunks:
+            return 0
+
+        with tracer.span('embed_index', chunks=len(chunks)):
+            if self.vector_store is None:
+                # Chroma's in-memory client is shared by the process, so every document gets its own collection
+                self.vector_store = Chroma.from_documents(documents=chunks, embedding=get_embeddings(),
+                                                          collection_name=f"doc-{uuid.uuid4().hex}",
+                                                          persist_directory=self.persist_directory, ids=ids)
+            else:
+                self.vector_store.add_documents(chunks, ids=ids)
+        if self.chain is None:
+            self._build_chain()
+        return len(chunks)
+
+    def delete_chunks(self, ids):
+        """Remove chunks added with these ids, e.g. what a failed streamed file had already indexed."""
+        if ids and self.vector_store is not None:
+            self.vector_store.delete(ids=ids)
+
+    def _build_chain(self):
+        self.retriever = self.vector_store.as_retriever(
+            search_type="similarity_score_threshold",
+            search_kwargs={
+                "k": 3,
+                "score_threshold": 0.2,
+            },
+        )
+
+        self.chain = ({"context": traced(self.retriever, 'retrieve', describe_documents), "question": RunnablePassthrough()}
+                      | traced(self.prompt, 'prompt')
+                      | traced(self.model, 'generate', describe_message)
+                      | StrOutputParser())
+
+    def ask(self, query: str):
+        if not self.chain:
+            return "Please, add a document first."
+
+        try:
+            with tracer.span('ask'):
+                if self.router is not None:
+                    return self._ask_routed(query)
+                return self.chain.invoke(query)
+        except Exception as e:
+            return f"Error during query processing: {str(e)}"
+
+    def retrieve(self, query: str):
+        """Return the chunks the chain would use as context for `query`, with their score in metadata['relevance']."""
+        if not self.retriever:
+            return []
+        with tracer.span('retrieve') as span:
+            # Same search as the retriever, but keeping the scores for routing
+            pairs = self.vector_store.similarity_search_with_relevance_scores(query, **self.retriever.search_kwargs)
+            docs = []
+            for doc, score in pairs:
+                doc.metadata['relevance'] = score
+                docs.append(doc)
+            span.set(chunks=len(docs))
+        return docs
+
+    def _ask_routed(self, query: str, context=None):
+        if context is None:
+            context = self.retrieve(query)
+        relevance = max((doc.metadata.get('relevance', 0.0) for doc in context), default=0.0)
+
+        def answer(model):
+            chain = self.prompt | get_chat_model(model) | StrOutputParser()
+            return chain.invoke({"context": context, "question": query})
+        return self.router.answer(query, answer, relevance)
+
+    def stream(self, query: str, context=None):
+        """Yield the answer as it is generated, using already retrieved `context` chunks when given."""
+        if not self.chain:
+            yield "Please, add a document first."
+            return
+
+        with tracer.span('ask', prefetched=context is not None) as span:
+            start = time.perf_counter()
+            if context is None:
+                context = self.retrieve(query)
+            if self.router is not None:
+                # The small model's answer may be replaced, so routed answers arrive in one piece
+                yield self._ask_routed(query, context)
+                return
+            answer = self.prompt | self.model | StrOutputParser()
+            first = True
+            for text in answer.stream({"context": context, "question": query}):
+                if first:
+                    span.set(first_token_ms=round((time.perf_counter() - start) * 1000, 1))
+                    first = False
+                yield text
+
+    def clear(self):
+        if self.vector_store is not None:
+            self.vector_store.delete_collection()
+        if self.persist_directory is not None:
+            shutil.rmtree(self.persist_directory, ignore_errors=True)
+            self.persist_directory = None
+        self.vector_store = None
+        self.retriever = None
+        self.chain = None
+
+# The document chat started out as a PDF-only class
+ChatPDF = ChatDocument
@@ -0,0 +1,114 @@
+import os
+
+# Leading bytes of the binary formats the examples understand
+MAGIC_BYTES = (
+    (b'%PDF-', 'pdf'),
+    (b'\x89PNG\r\n\x1a\n', 'image'),
+    (b'\xff\xd8\xff', 'image'),
+    (b'GIF87a', 'image'),
+    (b'GIF89a', 'image'),
+    (b'ID3', 'audio'),
+    (b'fLaC', 'audio'),
+    (b'OggS', 'audio'),
+)
+
+# Byte order marks of Unicode text, longest first since UTF-32 LE starts like UTF-16 LE
+BOMS = (
+    (b'\xff\xfe\x00\x00', 'utf-32'),
+    (b'\x00\x00\xfe\xff', 'utf-32'),
+    (b'\xef\xbb\xbf', 'utf-8-sig'),
+    (b'\xff\xfe', 'utf-16'),
+    (b'\xfe\xff', 'utf-16'),
+)
+
+HTML_STARTS = ('<!doctype html', '<html', '<head', '<body')
+
+# Fallback when the content does not tell, e.g. an empty file
+EXTENSIONS = {
+    'pdf': 'pdf',
+    'html': 'html',
+    'htm': 'html',
+    'txt': 'txt',
+    'md': 'txt',
+    'jpg': 'image',
+    'jpeg': 'image',
+    'png': 'image',
+    'mp3': 'audio',
+    'wav': 'audio',
+}
+
+def bom_encoding(head):
+    """The codec for text starting with a byte order mark, or None without one."""
+    for bom, encoding in BOMS:
+        if head.startswith(bom):
+            return encoding
+    return None
+
+def text_encoding(path):
+    """The codec to read a text file with: the one its byte order mark names, UTF-8 otherwise."""
+    with open(path, 'rb') as f:
+        return bom_encoding(f.read(4)) or 'utf-8'
+
+def is_mpeg_audio(head):
+    """Whether `head` starts with a valid MPEG audio frame header, i.e. an mp3 without an ID3 tag."""
+    if len(head) < 3 or head[0] != 0xff or head[1] & 0xe0 != 0xe0:
+        return False
+    # Reserved version, layer, bitrate and sample rate values mean it is not a frame header
+    version = (head[1] >> 3) & 0x03
+    layer = (head[1] >> 1) & 0x03
+    bitrate = head[2] >> 4
+    sample_rate = (head[2] >> 2) & 0x03
+    return version != 0b01 and layer != 0b00 and bitrate != 0b1111 and sample_rate != 0b11
+
+def audio_format(path):
+    """Return 'wav', 'mp3', 'flac' or 'ogg' from the first bytes of an audio file, or None when it is none of these."""
+    with open(path, 'rb') as f:
+        head = f.read(12)
+    if head[:4] == b'RIFF' and head[8:12] == b'WAVE':
+        return 'wav'
+    if head.startswith(b'ID3') or is_mpeg_audio(head):
+        return 'mp3'
+    if head.startswith(b'fLaC'):
+        return 'flac'
+    if head.startswith(b'OggS'):
+        return 'ogg'
+    return None
+
+def _text_kind(text, extension):
+    lowered = text.lstrip('\ufeff \t\r\n').lower()
+    if lowered.startswith(HTML_STARTS) or EXTENSIONS.get(extension) == 'html':
+        return 'html'
+    return 'txt'
+
+def sniff_kind(path, head_size=512):
+    """Return 'pdf', 'html', 'txt', 'image' or 'audio' for the file, or None when it is not supported.
+
+    The type comes from the first bytes of the file, so misnamed or extensionless
+    files are still routed to the right loader; the extension is only a fallback.
+    """
+    with open(path, 'rb') as f:
+        head = f.read(head_size)
+    extension = os.path.splitext(path)[1].lstrip('.').lower()
+
+    for magic, kind in MAGIC_BYTES:
+        if head.startswith(magic):
+            return kind
+    if head[:4] == b'RIFF' and head[8:12] in (b'WAVE', b'WEBP'):
+        return 'audio' if head[8:12] == b'WAVE' else 'image'
+    # Before the frame sync check: the UTF-16 LE mark FF FE looks like the start of an MPEG frame
+    encoding = bom_encoding(head)
+    if encoding is not None:
+        return _text_kind(head.decode(encoding, errors='ignore'), extension)
+    if is_mpeg_audio(head):
+        return 'audio'
+
+    if head and b'\x00' not in head:
+        try:
+            # The head may end inside a multi-byte character
+            text = head.decode('utf-8', errors='strict' if len(head) < head_size else 'ignore')
+        except UnicodeDecodeError:
+            text = None
+        if text is not None:
+            return _text_kind(text, extension)
+
+    return EXTENSIONS.get(extension)
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+import threading
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'llm-app-insights', 'images')
+
+class ImageCache:
+    """On-disk cache for vision requests.
+
+    Preprocessed base64 payloads are stored per (image hash, size) so follow-up
+    questions and later runs skip re-encoding; answers are stored per
+    (image hash, model, question) so repeated questions are free.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.payload_dir = os.path.join(cache_dir, 'payloads')
+        self.answer_dir = os.path.join(cache_dir, 'answers')
+        os.makedirs(self.payload_dir, exist_ok=True)
+        os.makedirs(self.answer_dir, exist_ok=True)
+
+    @staticmethod
+    def image_hash(image_path):
+        """Return the sha256 of the image file contents."""
+        digest = hashlib.sha256()
+        with open(image_path, 'rb') as image_file:
+            for block in iter(lambda: image_file.read(1 << 20), b''):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def get_payload(self, image_path, prepare, size):
+        """Return (image hash, base64 payload), calling prepare(image_path, size) only on a cache miss.
+
+        A `size` of None stands for the original image.
+        """
+        image_hash = self.image_hash(image_path)
+        payload_path = os.path.join(self.payload_dir, f"{image_hash}-{size or 'original'}.b64")
+        if os.path.exists(payload_path):
+            with open(payload_path, encoding='utf-8') as payload_file:
+                return image_hash, payload_file.read()
+        payload = prepare(image_path, size)
+        self._write(payload_path, payload)
+        return image_hash, payload
+
+    def get_answer(self, image_hash, model, question):
+        """Return the cached answer for this image, model and question, or None."""
+        answer_path = self._answer_path(image_hash, model, question)
+        if not os.path.exists(answer_path):
+            return None
+        with open(answer_path, encoding='utf-8') as answer_file:
+            return json.load(answer_file).get('response')
+
+    def put_answer(self, image_hash, model, question, response):
+        """Store the answer for this image, model and question."""
+        record = {"image": image_hash, "model": model, "question": question, "response": response}
+        self._write(self._answer_path(image_hash, model, question), json.dumps(record))
+
+    def _answer_path(self, image_hash, model, question):
+        key = hashlib.sha256(json.dumps([image_hash, model, question.strip()]).encode('utf-8')).hexdigest()
+        return os.path.join(self.answer_dir, f"{key}.json")
+
+    @staticmethod
+    def _write(path, content):
+        # Write to a temporary file first so concurrent readers never see partial content
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as tmp_file:
+            tmp_file.write(content)
+        os.replace(tmp_path, path)
@@ -0,0 +1,170 @@
+import base64
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from itertools import repeat
+from .client import Shed, generate
+
+try:
+    from PIL import Image
+except ImportError:  # Pillow is optional, images are then sent at full resolution
+    Image = None
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+DEFAULT_QUESTION = 'Describe this image in detail.'
+
+# Longest image side sent in batch mode, the llava 1.6 input resolution
+BATCH_SIZE = 672
+
+def encode_image_to_base64(image_path):
+    """Encode the image to a base64-encoded string."""
+    with open(image_path, "rb") as image_file:
+        return base64.b64encode(image_file.read()).decode('utf-8')
+
+def prepare_image(image_path, size=BATCH_SIZE):
+    """Downscale the image to the model input resolution, re-encode it as JPEG and return it base64-encoded.
+
+    With `size` None the original file is sent unchanged.
+    """
+    if size is None or Image is None:
+        return encode_image_to_base64(image_path)
+    with Image.open(image_path) as image:
+        image = image.convert('RGB')
+        image.thumbnail((size, size))
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=90)
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+class ChatImage:
+    def __init__(self, model='llava:13b', cache=None):
+        self.model = model
+        self.cache = cache
+        self.base64_image_string = None
+        self.image_hash = None
+
+    def encode_image_to_base64(self, image_path):
+        """Encode the image to a base64-encoded string."""
+        self.base64_image_string = encode_image_to_base64(image_path)
+        self.image_hash = None
+
+    def load_image(self, image_path, size=None):
+        """Load the image payload, reusing the cached one from an earlier run when there is one.
+
+        The original file is sent unless `size` asks for a downscaled copy; the cache
+        stores exactly what would be sent without it.
+        """
+        if self.cache is None:
+            self.base64_image_string = prepare_image(image_path, size)
+            self.image_hash = None
+        else:
+            self.image_hash, self.base64_image_string = self.cache.get_payload(image_path, prepare_image, size)
+
+    def get_response(self, question):
+        """Send request to the API and print the response."""
+        if not self.base64_image_string:
+            print("Please provide an image using the 'load_image' method before asking a question.")
+            return
+
+        answer = self.answer(self.base64_image_string, question, self.image_hash)
+        if answer is not None:
+            print("Response from the model:", answer)
+
+    def answer(self, base64_image_string, question, image_hash=None, priority='interactive'):
+        """Return the answer for the image, served from the cache when the same question was asked before."""
+        cacheable = self.cache is not None and image_hash is not None
+        if cacheable:
+            cached_answer = self.cache.get_answer(image_hash, self.model, question)
+            if cached_answer is not None:
+                return cached_answer
+        answer = self.request_response(base64_image_string, question, priority)
+        if cacheable and answer is not None:
+            self.cache.put_answer(image_hash, self.model, question, answer)
+        return answer
+
+    def interactive_mode(self):
+        """Handle interactive mode where the user can input multiple questions."""
+        print("Entering interactive mode. Type 'exit' to quit.")
+        while True:
+            question = input("Enter your question: ")
+            if question.lower() == 'exit':
+                break
+            else:
+                self.get_response(question)
+
+    def request_response(self, base64_image_string, question, priority='interactive'):
+        """Send request to the API for the given image and return the response text, or None on failure."""
+        json_response = generate(question, model=self.model, images=[base64_image_string], priority=priority)
+        return json_response.get("response") if json_response is not None else None
+
+    def batch_mode(self, directory, question, output_path, size=BATCH_SIZE, max_inflight=4):
+        """Ask the same question about every image in a directory and write one JSON line per image.
+
+        Images are resized and encoded in a process pool while earlier ones are already
+        being sent; at most `max_inflight` requests are outstanding at any time. With a
+        cache, preprocessed payloads and answers from earlier runs are reused. An image
+        that cannot be read or answered gets a line with an "error" field.
+        """
+        image_paths = sorted(
+            os.path.join(directory, name) for name in os.listdir(directory)
+            if name.lower().endswith(IMAGE_EXTENSIONS)
+        )
+        if not image_paths:
+            print(f"No images found in {directory}")
+            return
+        if Image is None:
+            print("Pillow is not installed, sending images at full resolution (pip install pillow).")
+
+        def ask(image_path, encoding):
+            request_start = time.perf_counter()
+            result = {"file": image_path, "model": self.model, "question": question}
+            # One unreadable image or failed request is recorded in its own line instead of ending the batch
+            try:
+                prepared = encoding.result()
+                image_hash, base64_image_string = prepared if self.cache is not None else (None, prepared)
+                result["payload_bytes"] = len(base64_image_string)
+                result["response"] = self.answer(base64_image_string, question, image_hash, priority='batch')
+            except Shed as e:
+                result["response"] = None
+                result["error"] = str(e)
+                result["shed"] = True
+            except Exception as e:
+                result["response"] = None
+                result["error"] = f"{type(e).__name__}: {e}"
+            result["seconds"] = round(time.perf_counter() - request_start, 3)
+            return result
+
+        start = time.perf_counter()
+        original_bytes = sum(os.path.getsize(path) for path in image_paths if os.path.isfile(path))
+        payload_bytes = 0
+        shed = 0
+        failed = 0
+        with ProcessPoolExecutor() as encoders, ThreadPoolExecutor(max_workers=max_inflight) as senders, \
+                open(output_path, 'w', encoding='utf-8') as output:
+            futures = []
+            for image_path in image_paths:
+                if self.cache is not None:
+                    encoding = encoders.submit(self.cache.get_payload, image_path, prepare_image, size)
+                else:
+                    encoding = encoders.submit(prepare_image, image_path, size)
+                futures.append(senders.submit(ask, image_path, encoding))
+            for done, future in enumerate(as_completed(futures), start=1):
+                result = future.result()
+                payload_bytes += result.get("payload_bytes", 0)
+                output.write(json.dumps(result) + "\n")
+                if "error" in result:
+                    if result.get("shed"):
+                        shed += 1
+                    else:
+                        failed += 1
+                    print(f"[{done}/{len(image_paths)}] {result['file']}: {result['error']}")
+                else:
+                    print(f"[{done}/{len(image_paths)}] {result['file']} ({result['seconds']}s)")
+
+        print(f"Processed {len(image_paths)} images in {time.perf_counter() - start:.1f}s, "
+              f"payload {payload_bytes / 1e6:.1f} MB (source files {original_bytes / 1e6:.1f} MB). Results written to {output_path}")
+        if shed:
+            print(f"{shed} images were shed by the scheduler proxy and have no response; run them again later")
+        if failed:
+            print(f"{failed} images failed, see the error field of their lines in {output_path}")
@@ -0,0 +1,170 @@
+import os
+import queue
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from langchain.schema import Document
+from .audio import AudioTranscriber, strip_timestamps
+from .filetypes import sniff_kind
+from .images import BATCH_SIZE, ChatImage, prepare_image
+from .tracing import tracer
+
+CAPTION_PROMPT = 'Describe this image in detail, including any text, labels or numbers it contains.'
+
+def expand_paths(paths):
+    """Yield the files named on the command line, walking into directories."""
+    for path in paths:
+        if os.path.isdir(path):
+            for root, dirs, files in os.walk(path):
+                dirs.sort()
+                for name in sorted(files):
+                    if not name.startswith('.'):
+                        yield os.path.join(root, name)
+        else:
+            yield path
+
+class MixedMediaIngest:
+    """Build one queryable index from documents, audio and images.
+
+    Every file is sniffed by content and handed to the pool for its kind:
+    documents are loaded, audio is transcribed by whisper and images are
+    captioned by a vision model. Whatever the pools produce is indexed by the
+    calling thread as soon as it is ready, so embedding overlaps with the
+    slower transcription and captioning still running.
+    """
+
+    def __init__(self, chat_document, whisper_path=None, whisper_model=None, caption_model='llava:13b',
+                 image_cache=None, document_workers=4, audio_workers=1, image_workers=4, batch_size=64):
+        self.chat_document = chat_document
+        self.transcriber = AudioTranscriber(whisper_path, whisper_model) if whisper_path and whisper_model else None
+        self.captioner = ChatImage(model=caption_model, cache=image_cache)
+        self.workers = {'document': document_workers, 'audio': audio_workers, 'image': image_workers}
+        self.batch_size = batch_size
+
+    def load_document(self, path, kind):
+        if self.chat_document.should_stream(path, kind):
+            # Too large to load whole: hand back a lazy stream of chunk batches for the indexer to pull
+            return self._tag_batches(self.chat_document.stream_chunks(path, kind, self.batch_size), kind)
+        docs = self.chat_document.load(path, file_type=kind)
+        for doc in docs:
+            doc.metadata.update(source=path, kind=kind)
+        return docs
+
+    @staticmethod
+    def _tag_batches(batches, kind):
+        for batch in batches:
+            for chunk in batch:
+                chunk.metadata['kind'] = kind
+            yield batch
+
+    def load_audio(self, path, kind):
+        with tracer.span('transcribe', file=os.path.basename(path)):
+            transcript = self.transcriber.process_audio(path, echo=False)
+        if not transcript:
+            raise RuntimeError("whisper produced no transcript")
+        return [Document(page_content=strip_timestamps(transcript), metadata={'source': path, 'kind': kind})]
+
+    def load_image(self, path, kind):
+        with tracer.span('caption', file=os.path.basename(path)):
+            if self.captioner.cache is not None:
+                image_hash, payload = self.captioner.cache.get_payload(path, prepare_image, BATCH_SIZE)
+            else:
+                image_hash, payload = None, prepare_image(path)
+            caption = self.captioner.answer(payload, CAPTION_PROMPT, image_hash, priority='batch')
+        if not caption:
+            raise RuntimeError("no caption from the vision model")
+        return [Document(page_content=f"Image {os.path.basename(path)}: {caption}", metadata={'source': path, 'kind': kind})]
+
+    def _add_streamed(self, batches):
+        """Index a streamed file batch by batch; when it fails partway, take its chunks out again before re-raising."""
+        added = []
+        try:
+            for batch in batches:
+                ids = [uuid.uuid4().hex for _ in batch]
+                self.chat_document.add_chunks(batch, ids=ids)
+                added.extend(ids)
+        except Exception:
+            self.chat_document.delete_chunks(added)
+            raise
+        return len(added)
+
+    def run(self, paths):
+        """Ingest every file under `paths` and return a {kind: files indexed} summary."""
+        start = time.perf_counter()
+        results = queue.Queue()
+        pools = {}
+        submitted = 0
+        skipped = []
+
+        def submit(pool_name, loader, path, kind):
+            if pool_name not in pools:
+                pools[pool_name] = ThreadPoolExecutor(max_workers=self.workers[pool_name],
+                                                      thread_name_prefix=f"ingest-{pool_name}")
+            future = pools[pool_name].submit(loader, path, kind)
+            future.add_done_callback(lambda f: results.put((path, kind, f)))
+
+        for path in expand_paths(paths):
+            try:
+                kind = sniff_kind(path)
+            except OSError as e:
+                skipped.append((path, str(e)))
+                continue
+            if kind in ('pdf', 'html', 'txt'):
+                if self.chat_document.should_stream(path, kind):
+                    # Decided before anything is indexed, so the whole index goes to disk
+                    self.chat_document.use_disk_index()
+                submit('document', self.load_document, path, kind)
+            elif kind == 'audio' and self.transcriber is None:
+                skipped.append((path, "no whisper executable configured"))
+                continue
+            elif kind == 'audio' and not os.path.exists(self.transcriber.model_path):
+                skipped.append((path, f"whisper model not found: {self.transcriber.model_path}"))
+                continue
+            elif kind == 'audio':
+                submit('audio', self.load_audio, path, kind)
+            elif kind == 'image':
+                submit('image', self.load_image, path, kind)
+            else:
+                skipped.append((path, "unsupported file type"))
+                continue
+            submitted += 1
+
+        # Index results in arrival order, batching whatever is already waiting into one embedding call
+        indexed = {}
+        chunks = 0
+        received = 0
+        try:
+            while received < submitted:
+                batch = []
+                pending = [results.get()]
+                while len(pending) < self.batch_size:
+                    try:
+                        pending.append(results.get_nowait())
+                    except queue.Empty:
+                        break
+                for path, kind, future in pending:
+                    received += 1
+                    try:
+                        docs = future.result()
+                        if not isinstance(docs, list):
+                            # Streamed file: read, split and embed one batch at a time on this thread
+                            chunks += self._add_streamed(docs)
+                            docs = []
+                    except Exception as e:
+                        print(f"[{received}/{submitted}] {path}: failed ({e})", file=sys.stderr)
+                        continue
+                    batch.extend(docs)
+                    indexed[kind] = indexed.get(kind, 0) + 1
+                    print(f"[{received}/{submitted}] {path}: {kind} ready ({time.perf_counter() - start:.1f}s)")
+                if batch:
+                    chunks += self.chat_document.add_documents(batch)
+        finally:
+            for pool in pools.values():
+                pool.shutdown(wait=True, cancel_futures=True)
+
+        for path, reason in skipped:
+            print(f"Skipped {path}: {reason}")
+        summary = ', '.join(f"{count} {kind}" for kind, count in sorted(indexed.items())) or "nothing"
+        print(f"Indexed {summary} into {chunks} chunks in {time.perf_counter() - start:.1f}s")
+        return indexed
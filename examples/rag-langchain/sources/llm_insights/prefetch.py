@@ -0,0 +1,168 @@
+import re
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from .client import generate
+from .resources import get_embeddings
+from .tracing import tracer
+
+OPENING_QUESTION = 'What does this document mainly talk about?'
+
+SUGGEST_PROMPT = """Here are excerpts from a document:
+
+{context}
+
+{exchange}Suggest {count} short follow-up questions a reader would ask next about this document.
+Write one question per line, without numbering or any other text."""
+
+NUMBERING = re.compile(r'^\s*(?:\d+[.)]|[-*•])\s*')
+
+def normalize(question):
+    return ' '.join(question.lower().split())
+
+class PrefetchSession:
+    """Interactive document chat that uses the time the user spends reading and typing.
+
+    At session start the model is loaded with `keep_alive` and the embedding model
+    is warmed up. After every answer a few follow-up questions are suggested in
+    the background and their chunks are retrieved ahead of time, so picking one
+    by number skips embedding and search, and the answer is streamed as it is
+    generated. The prompt never waits for suggestions, and a suggestion still
+    being generated is abandoned when a question is asked, so it does not
+    compete with the answer for the model.
+    """
+
+    def __init__(self, chat_document, suggestions=3, keep_alive='30m'):
+        self.chat_document = chat_document
+        self.suggestions = suggestions
+        self.keep_alive = keep_alive
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='prefetch')
+        self.prefetched = {}
+        self.suggested = []
+        self.pending_suggestions = None
+        self.cancel_suggestions = threading.Event()
+
+    def start(self):
+        """Warm up the model and the embedder, then prefetch an opening question and suggest more."""
+        self.executor.submit(self._warm_model)
+        self.executor.submit(self._warm_embeddings)
+        self.prefetch(OPENING_QUESTION)
+        self._start_suggestions(OPENING_QUESTION, None)
+
+    def _warm_model(self):
+        with tracer.span('warm_model', model=self.chat_document.model_name):
+            # An empty prompt loads the model without generating anything
+            generate('', model=self.chat_document.model_name, keep_alive=self.keep_alive)
+
+    def _warm_embeddings(self):
+        with tracer.span('warm_embeddings'):
+            get_embeddings().embed_query('warm up')
+
+    def prefetch(self, question):
+        key = normalize(question)
+        if key not in self.prefetched:
+            self.prefetched[key] = self.executor.submit(self.chat_document.retrieve, question)
+
+    def _start_suggestions(self, question, answer, docs=None):
+        self.cancel_suggestions = threading.Event()
+        self.pending_suggestions = self.executor.submit(self._suggest, question, answer, docs, self.cancel_suggestions)
+
+    def _stop_suggestions(self):
+        """Abandon suggestions still queued or generating, so the model is free for the question."""
+        self.cancel_suggestions.set()
+        if self.pending_suggestions is not None:
+            self.pending_suggestions.cancel()
+
+    def _suggest(self, question, answer, docs=None, cancel=None):
+        if docs is None:
+            context_future = self.prefetched.get(normalize(question))
+            docs = context_future.result() if context_future else self.chat_document.retrieve(question)
+        context = "\n\n".join(doc.page_content for doc in docs) or "(no matching excerpts)"
+        exchange = f"The reader asked: {question}\nThe answer was: {answer}\n\n" if answer else ""
+        prompt = SUGGEST_PROMPT.format(context=context, exchange=exchange, count=self.suggestions)
+        with tracer.span('suggest'):
+            # Batch priority and a short completion, so suggestions never hold up a real question for long
+            response = generate(prompt, model=self.chat_document.model_name, priority='batch', cancel=cancel,
+                                keep_alive=self.keep_alive, options={"num_predict": 32 * self.suggestions})
+        if response is None or (cancel is not None and cancel.is_set()):
+            return []
+        questions = []
+        for line in response.get("response", "").splitlines():
+            line = NUMBERING.sub('', line).strip().strip('"')
+            if line.endswith('?') and len(questions) < self.suggestions:
+                questions.append(line)
+        for suggested in questions:
+            self.prefetch(suggested)
+        return questions
+
+    def show_suggestions(self):
+        """Print the suggestions when they are ready, without ever waiting for them."""
+        self.suggested = []
+        pending = self.pending_suggestions
+        if pending is None:
+            return
+        if not pending.done():
+            print("(Follow-up suggestions are on their way, press Enter to see them.)")
+            return
+        try:
+            self.suggested = pending.result()
+        except Exception:
+            # Failed or abandoned: ask freely
+            return
+        if self.suggested:
+            print("Suggested follow-ups (type the number to ask):")
+            for number, question in enumerate(self.suggested, start=1):
+                print(f"  {number}. {question}")
+
+    def resolve(self, text):
+        """Map a suggestion number to its question, anything else is the question itself."""
+        if text.strip().isdigit() and 1 <= int(text) <= len(self.suggested):
+            question = self.suggested[int(text) - 1]
+            print(f"Question: {question}")
+            return question
+        return text
+
+    def ask(self, question):
+        """Stream the answer to stdout and start suggesting follow-ups; returns the full answer."""
+        self._stop_suggestions()
+        future = self.prefetched.pop(normalize(question), None)
+        # Chunks for the suggestions that were not picked are stale now
+        self.prefetched.clear()
+        context = None
+        if future is not None:
+            try:
+                context = future.result()
+            except Exception:
+                # The prefetch failed, retrieve again below
+                context = None
+        parts = []
+        print("Answer: ", end='', flush=True)
+        try:
+            if context is None:
+                context = self.chat_document.retrieve(question)
+            for text in self.chat_document.stream(question, context):
+                parts.append(text)
+                print(text, end='', flush=True)
+        except Exception as e:
+            print(f"Error during query processing: {str(e)}", file=sys.stderr)
+        print()
+        answer = ''.join(parts)
+        self._start_suggestions(question, answer, context)
+        return answer
+
+    def interactive_mode(self, prompt="Ask a question: "):
+        self.start()
+        while True:
+            self.show_suggestions()
+            text = input(prompt)
+            if text.lower() == 'exit':
+                break
+            if not text.strip():
+                # Enter on its own shows the suggestions that arrived meanwhile
+                continue
+            self.ask(self.resolve(text))
+        self.close()
+
+    def close(self):
+        self._stop_suggestions()
+        self.executor.shutdown(wait=False, cancel_futures=True)
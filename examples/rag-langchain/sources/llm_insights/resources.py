@@ -0,0 +1,76 @@
+import os
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+
+def ollama_url(host):
+    """Turn an OLLAMA_HOST value into a base URL, the way the Ollama CLI reads it.
+
+    The server uses the same variable as its bind address, so it is often set
+    without a scheme (`127.0.0.1:11434`) or to a wildcard (`0.0.0.0`) that a
+    client cannot connect to.
+    """
+    host = (host or '').strip()
+    scheme, separator, rest = host.partition('://')
+    if not separator:
+        scheme, rest, default_port = 'http', host, 11434
+    else:
+        default_port = 443 if scheme == 'https' else 80
+    parts = urlsplit(f"{scheme}://{rest}")
+    hostname = parts.hostname or 'localhost'
+    if hostname in ('0.0.0.0', '::'):
+        hostname = 'localhost'
+    if ':' in hostname:
+        hostname = f"[{hostname}]"
+    return f"{scheme}://{hostname}:{parts.port or default_port}{parts.path.rstrip('/')}"
+
+# Ollama server, override with e.g. OLLAMA_HOST=127.0.0.1:11435
+OLLAMA_HOST = ollama_url(os.getenv('OLLAMA_HOST'))
+
+# Characters per indexed chunk and shared between neighbouring chunks
+CHUNK_SIZE = 1024
+CHUNK_OVERLAP = 100
+
+# Process-wide shared objects, created on first use so callers only pay for what they touch
+_lock = threading.Lock()
+_session = None
+_embeddings = None
+_text_splitter = None
+_chat_models = {}
+
+def get_session():
+    """HTTP session shared by every raw Ollama call, so connections are kept alive and reused."""
+    global _session
+    with _lock:
+        if _session is None:
+            _session = requests.Session()
+            # Enough pooled connections for the concurrent batch modes
+            _session.mount('http://', HTTPAdapter(pool_connections=4, pool_maxsize=32))
+            _session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=32))
+        return _session
+
+def get_embeddings():
+    """FastEmbed embedding model, loaded once per process instead of once per document."""
+    global _embeddings
+    with _lock:
+        if _embeddings is None:
+            from langchain_community.embeddings import FastEmbedEmbeddings
+            _embeddings = FastEmbedEmbeddings()
+        return _embeddings
+
+def get_text_splitter():
+    global _text_splitter
+    with _lock:
+        if _text_splitter is None:
+            from langchain.text_splitter import RecursiveCharacterTextSplitter
+            _text_splitter = RecursiveCharacterTextSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        return _text_splitter
+
+def get_chat_model(model='mistral'):
+    """LangChain ChatOllama client for `model`, one per model name."""
+    with _lock:
+        if model not in _chat_models:
+            from langchain_community.chat_models import ChatOllama
+            _chat_models[model] = ChatOllama(model=model, base_url=OLLAMA_HOST)
+        return _chat_models[model]
@@ -0,0 +1,140 @@
+import atexit
+import re
+import sys
+import threading
+import time
+from .tracing import tracer
+
+# Openings of a sentence that refuses or hedges. Only sentence starts are checked, since
+# the same words also appear in confident answers ("patients are unable to sleep").
+HEDGES = (
+    r"i (?:do not|don't) know",
+    r"i(?: am|'m) not (?:sure|certain)",
+    r"i (?:cannot|can't|am unable to|'m unable to) (?:determine|answer|find|say)",
+    r"(?:the |this |that |such )?(?:answer|information) (?:is|was) not (?:available|provided|mentioned|given)",
+    r"(?:the |this )?(?:document|context|paper|text|excerpts?) (?:does|do) not (?:mention|provide|say|contain|specify|state)",
+    r"(?:the |this )?(?:document|context|paper|text|excerpts?) (?:doesn't|don't) (?:mention|provide|say|contain|specify|state)",
+    r"there is no (?:information|mention)",
+    r"no information",
+    r"it is (?:unclear|not clear) (?:from|in) the (?:document|context|paper|text|excerpts?)",
+    r"(?:unfortunately|sorry)\b",
+    r"not (?:mentioned|provided|available)",
+)
+
+SENTENCE_BREAK = re.compile(r'(?<=[.!?])\s+|\n+')
+
+class ModelRouter:
+    """Send each question to a small, fast model first and escalate to the large one only when needed.
+
+    A question goes straight to the large model when it is long or when the best
+    retrieved chunk scores below `min_relevance`. Answers from the small model
+    that are very short or have a sentence opening with a refusal or hedge are
+    regenerated by the large model. Every decision is logged, and the summary
+    estimates the time saved against the large model's average latency.
+    """
+
+    def __init__(self, small_model='phi3', large_model='mistral', max_small_words=30, min_relevance=0.5,
+                 min_answer_chars=20, hedges=HEDGES, verbose=True):
+        self.small_model = small_model
+        self.large_model = large_model
+        self.max_small_words = max_small_words
+        self.min_relevance = min_relevance
+        self.min_answer_chars = min_answer_chars
+        # A hedge may follow a connective, as in "However, the document does not mention..."
+        self.hedge_pattern = re.compile(r'(?:(?:however|but|sadly),?\s+)?(?:' + '|'.join(hedges) + ')', re.IGNORECASE)
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.counts = {'small': 0, 'escalated': 0, 'large': 0}
+        self.latencies = {'small': [], 'escalated': [], 'large': []}
+
+    def route(self, question, relevance=None):
+        """Return (model, reason) for the first attempt at answering `question`."""
+        words = len(question.split())
+        if words > self.max_small_words:
+            return self.large_model, f"long question ({words} words)"
+        if relevance is not None and relevance < self.min_relevance:
+            return self.large_model, f"weak retrieval (relevance {relevance:.2f})"
+        if relevance is not None:
+            return self.small_model, f"short question, relevance {relevance:.2f}"
+        return self.small_model, "short question"
+
+    def escalation_reason(self, answer):
+        """Why the small model's answer should not be trusted, or None when it looks fine."""
+        if answer is None or len(answer.strip()) < self.min_answer_chars:
+            return "answer too short"
+        for sentence in SENTENCE_BREAK.split(answer.strip()):
+            match = self.hedge_pattern.match(sentence.lstrip(' \t"\'*-'))
+            if match:
+                return f"low confidence ('{match.group(0)}')"
+        return None
+
+    def answer(self, question, generate, relevance=None):
+        """Answer with `generate(model)`, escalating to the large model when the small one is not confident."""
+        model, reason = self.route(question, relevance)
+        with tracer.span('route', model=model) as span:
+            answer, seconds = self._timed(generate, model)
+            route = 'large'
+            if model == self.small_model:
+                route = 'small'
+                escalation = self.escalation_reason(answer)
+                if escalation is not None:
+                    reason = f"{reason}; escalated: {escalation}"
+                    answer, large_seconds = self._timed(generate, self.large_model)
+                    seconds += large_seconds
+                    route = 'escalated'
+            span.set(route=route, reason=reason, seconds=round(seconds, 3))
+        self._record(route, seconds)
+        if self.verbose:
+            print(f"[route] {route} -> {self.small_model if route == 'small' else self.large_model} "
+                  f"({reason}) {seconds:.1f}s", file=sys.stderr)
+        return answer
+
+    @staticmethod
+    def _timed(generate, model):
+        start = time.perf_counter()
+        answer = generate(model)
+        return answer, time.perf_counter() - start
+
+    def _record(self, route, seconds):
+        with self.lock:
+            self.counts[route] += 1
+            self.latencies[route].append(seconds)
+
+    def estimated_savings(self):
+        """Seconds saved against sending everything to the large model, or None without a large-model baseline."""
+        with self.lock:
+            if not self.latencies['large']:
+                return None
+            baseline = sum(self.latencies['large']) / len(self.latencies['large'])
+            saved = sum(baseline - seconds for seconds in self.latencies['small'])
+            # Escalations paid for the small attempt on top of the large answer
+            lost = sum(max(0.0, seconds - baseline) for seconds in self.latencies['escalated'])
+            return saved - lost
+
+    def print_summary(self, file=None):
+        file = file or sys.stderr
+        total = sum(self.counts.values())
+        if not total:
+            return
+        average = sum(sum(values) for values in self.latencies.values()) / total
+        print(f"Routing: {self.counts['small']} small ({self.small_model}), {self.counts['escalated']} escalated, "
+              f"{self.counts['large']} large ({self.large_model}); average {average:.1f}s per answer", file=file)
+        savings = self.estimated_savings()
+        if savings is not None:
+            print(f"Estimated time saved against {self.large_model} only: {savings:.1f}s", file=file)
+
+def add_arguments(parser):
+    """Add the model routing options to a CLI parser."""
+    parser.add_argument('--route', action='store_true', help='Answer with a small model first and escalate to the main model only when needed')
+    parser.add_argument('--small-model', default='phi3', help='Small model tried first with --route (default: phi3)')
+    parser.add_argument('--route-max-words', type=int, default=30, help='Longer questions go straight to the main model (default: 30)')
+    parser.add_argument('--route-min-relevance', type=float, default=0.5, help='Weaker best retrieval scores go straight to the main model (default: 0.5)')
+
+def router_from_args(args, large_model):
+    """The ModelRouter configured on the command line, or None when routing is off."""
+    if not args.route:
+        return None
+    router = ModelRouter(small_model=args.small_model, large_model=large_model,
+                         max_small_words=args.route_max_words, min_relevance=args.route_min_relevance)
+    atexit.register(router.print_summary)
+    return router
@@ -0,0 +1,224 @@
+import http.client
+import json
+import math
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+PRIORITIES = ('interactive', 'batch')
+
+# Requests that occupy the model and therefore wait for a slot; everything else is passed straight through
+SCHEDULED_PATHS = ('/api/generate', '/api/chat', '/api/embeddings', '/api/embed')
+
+HOP_BY_HOP_HEADERS = {'connection', 'keep-alive', 'proxy-connection', 'transfer-encoding', 'te', 'trailer', 'upgrade', 'host'}
+
+class Overloaded(Exception):
+    """Raised when a request is shed because its priority class queue is full."""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+def percentile(values, percent):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+class Scheduler:
+    """Admission control and priority queueing in front of one Ollama server.
+
+    Each model runs at most `max_concurrency` requests at a time (overridable per
+    model). Waiting interactive requests always start before waiting batch ones,
+    so batch work is delayed while people are waiting; when a class's queue is
+    full, new requests of that class are shed with a retry hint instead.
+    """
+
+    def __init__(self, max_concurrency=1, model_concurrency=None, batch_queue_limit=8, interactive_queue_limit=64):
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = dict(model_concurrency or {})
+        self.queue_limits = {'interactive': interactive_queue_limit, 'batch': batch_queue_limit}
+        self.condition = threading.Condition()
+        self.active = defaultdict(int)
+        self.queues = defaultdict(lambda: {priority: deque() for priority in PRIORITIES})
+        self.counters = defaultdict(lambda: defaultdict(int))
+        self.waits = defaultdict(lambda: deque(maxlen=1000))
+        self.service_times = defaultdict(lambda: deque(maxlen=100))
+
+    def limit(self, model):
+        return self.model_concurrency.get(model, self.max_concurrency)
+
+    def _runnable(self, model, priority, ticket):
+        queues = self.queues[model]
+        if self.active[model] >= self.limit(model) or queues[priority][0] is not ticket:
+            return False
+        return priority == 'interactive' or not queues['interactive']
+
+    def retry_after(self, model, priority):
+        """Seconds until a shed request is likely to be admitted, from the recent service times."""
+        service_times = self.service_times[model]
+        average = sum(service_times) / len(service_times) if service_times else 1.0
+        queued = len(self.queues[model]['interactive'])
+        if priority == 'batch':
+            queued += len(self.queues[model]['batch'])
+        return max(1, math.ceil((queued + 1) * average / self.limit(model)))
+
+    @contextmanager
+    def slot(self, model, priority='interactive'):
+        """Hold one of the model's slots for the duration of the block, waiting in the priority queue first."""
+        if priority not in PRIORITIES:
+            priority = 'interactive'
+        key = (model, priority)
+        ticket = object()
+        enqueued = time.perf_counter()
+        with self.condition:
+            queue = self.queues[model][priority]
+            queue.append(ticket)
+            if len(queue) > self.queue_limits[priority] and not self._runnable(model, priority, ticket):
+                queue.pop()
+                self.counters[key]['shed'] += 1
+                raise Overloaded(f"{priority} queue for {model} is full ({len(queue)} waiting)",
+                                 self.retry_after(model, priority))
+            while not self._runnable(model, priority, ticket):
+                self.condition.wait()
+            queue.popleft()
+            self.active[model] += 1
+            self.counters[key]['admitted'] += 1
+            started = time.perf_counter()
+            self.waits[key].append(started - enqueued)
+            # The next in line may be runnable too when the model has free slots
+            self.condition.notify_all()
+        try:
+            yield started - enqueued
+        finally:
+            with self.condition:
+                self.active[model] -= 1
+                self.counters[key]['completed'] += 1
+                self.service_times[model].append(time.perf_counter() - started)
+                self.condition.notify_all()
+
+    def stats(self):
+        """Current queue depths, slot usage and queue-time percentiles per model and priority class."""
+        with self.condition:
+            report = {}
+            for model in sorted(set(self.queues) | set(self.active), key=str):
+                entry = {"active": self.active[model], "limit": self.limit(model)}
+                for priority in PRIORITIES:
+                    key = (model, priority)
+                    waits = list(self.waits[key])
+                    entry[priority] = {
+                        "queued": len(self.queues[model][priority]),
+                        "admitted": self.counters[key]['admitted'],
+                        "completed": self.counters[key]['completed'],
+                        "shed": self.counters[key]['shed'],
+                        "queue_p50_ms": round(percentile(waits, 50) * 1000, 1),
+                        "queue_p95_ms": round(percentile(waits, 95) * 1000, 1),
+                    }
+                report[str(model)] = entry
+            return report
+
+class SchedulerProxyHandler(BaseHTTPRequestHandler):
+    """Forwards Ollama API calls upstream, holding a scheduler slot while the model works on them."""
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/scheduler/stats':
+            self._send_json(200, self.server.scheduler.stats())
+        else:
+            self._forward(None)
+
+    def do_DELETE(self):
+        self._forward(self._read_body())
+
+    def do_POST(self):
+        body = self._read_body()
+        if self.path not in SCHEDULED_PATHS:
+            self._forward(body)
+            return
+        try:
+            model = json.loads(body or b'{}').get('model')
+        except ValueError:
+            model = None
+        priority = self.headers.get('X-Priority', 'interactive').strip().lower()
+        try:
+            with self.server.scheduler.slot(model, priority):
+                self._forward(body)
+        except Overloaded as e:
+            self._send_json(503, {"error": str(e)}, {'Retry-After': str(e.retry_after)})
+
+    def _read_body(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return self.rfile.read(length) if length else None
+
+    def _forward(self, body):
+        upstream = self.server.upstream
+        headers = {name: value for name, value in self.headers.items()
+                   if name.lower() not in HOP_BY_HOP_HEADERS and name.lower() != 'x-priority'}
+        connection = http.client.HTTPConnection(upstream.hostname, upstream.port or 80, timeout=self.server.timeout)
+        try:
+            connection.request(self.command, self.path, body=body, headers=headers)
+            response = connection.getresponse()
+        except OSError as e:
+            connection.close()
+            self._send_json(502, {"error": f"upstream {upstream.geturl()} unavailable: {e}"})
+            return
+        try:
+            self.send_response(response.status)
+            for name, value in response.getheaders():
+                if name.lower() not in HOP_BY_HOP_HEADERS:
+                    self.send_header(name, value)
+            self.send_header('Connection', 'close')
+            self.end_headers()
+            # Relay streamed NDJSON as it arrives so token streaming still works through the proxy
+            while True:
+                data = response.read1(65536)
+                if not data:
+                    break
+                self.wfile.write(data)
+                self.wfile.flush()
+        finally:
+            connection.close()
+
+    def _send_json(self, status, data, headers=None):
+        payload = json.dumps(data).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+class SchedulerProxy(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, upstream, scheduler, timeout=600):
+        super().__init__(address, SchedulerProxyHandler)
+        self.upstream = urlsplit(upstream)
+        self.scheduler = scheduler
+        self.timeout = timeout
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def start_proxy(upstream, host='127.0.0.1', port=0, **scheduler_options):
+    """Start a scheduling proxy for `upstream` in a background thread and return it; port 0 picks a free port."""
+    proxy = SchedulerProxy((host, port), upstream, Scheduler(**scheduler_options))
+    threading.Thread(target=proxy.serve_forever, daemon=True).start()
+    return proxy
+
+def print_stats(stats, file=sys.stdout):
+    for model, entry in stats.items():
+        print(f"{model}: {entry['active']}/{entry['limit']} active", file=file)
+        for priority in PRIORITIES:
+            p = entry[priority]
+            print(f"  {priority:<12} queued {p['queued']:>3}  done {p['completed']:>5}  shed {p['shed']:>4}  "
+                  f"queue p50 {p['queue_p50_ms']:.0f} ms  p95 {p['queue_p95_ms']:.0f} ms", file=file)
@@ -0,0 +1,114 @@
+from html.parser import HTMLParser
+
+# Characters decoded per read; together with the batch size this bounds memory, not the file size
+BLOCK_SIZE = 1 << 20
+
+# Split points in order of preference, like RecursiveCharacterTextSplitter
+SEPARATORS = ('\n\n', '\n', ' ')
+
+# Tags whose text is not part of the page content. Not <head>: its closing tag is
+# optional, and the only text in it is the <title>, which is worth keeping.
+SKIP_TAGS = {'script', 'style', 'noscript', 'template'}
+
+# Tags that end a line of text
+BLOCK_TAGS = {'p', 'div', 'br', 'li', 'tr', 'table', 'section', 'article', 'header', 'footer',
+              'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'pre', 'blockquote', 'title'}
+
+def iter_text_blocks(path, block_size=BLOCK_SIZE, encoding='utf-8'):
+    """Yield the file's text in blocks of at most `block_size` characters.
+
+    The buffered text reader decodes across block boundaries, so multi-byte
+    characters are never cut in half; undecodable bytes are replaced.
+    """
+    with open(path, encoding=encoding, errors='replace', newline='') as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                break
+            yield block
+
+class _TextExtractor(HTMLParser):
+    """Incremental HTML to text converter, fed one block at a time."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self.skip_depth = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self.skip_depth += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append('\n')
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self.skip_depth = max(0, self.skip_depth - 1)
+        elif tag in BLOCK_TAGS:
+            self.parts.append('\n\n')
+
+    def handle_data(self, data):
+        if not self.skip_depth:
+            self.parts.append(data)
+
+    def take(self):
+        text = ''.join(self.parts)
+        self.parts = []
+        return text
+
+def iter_html_text(path, block_size=BLOCK_SIZE, encoding='utf-8'):
+    """Yield the visible text of an HTML file block by block, without building the whole DOM."""
+    parser = _TextExtractor()
+    for block in iter_text_blocks(path, block_size, encoding):
+        parser.feed(block)
+        text = parser.take()
+        if text:
+            yield text
+    parser.close()
+    text = parser.take()
+    if text:
+        yield text
+
+def _split_point(text, start, chunk_size):
+    """Index where the chunk starting at `start` should end, preferring paragraph, line and word breaks."""
+    end = start + chunk_size
+    for separator in SEPARATORS:
+        index = text.rfind(separator, start + chunk_size // 2, end)
+        if index != -1:
+            return index + len(separator)
+    return end
+
+def split_stream(blocks, chunk_size=1024, chunk_overlap=100):
+    """Split a stream of text blocks into overlapping chunks of at most `chunk_size` characters.
+
+    Only the unfinished tail of a block is carried over to the next one, so the
+    whole text is never held in memory.
+    """
+    buffer = ''
+    for block in blocks:
+        buffer += block
+        position = 0
+        while len(buffer) - position > chunk_size:
+            cut = _split_point(buffer, position, chunk_size)
+            chunk = buffer[position:cut].strip()
+            if chunk:
+                yield chunk
+            # Step back for the overlap, starting on a word, but always make progress
+            back = cut - min(chunk_overlap, (cut - position) // 2)
+            space = buffer.find(' ', back, cut)
+            position = space + 1 if space != -1 and space + 1 < cut else back
+        buffer = buffer[position:]
+    tail = buffer.strip()
+    if tail:
+        yield tail
+
+def iter_batches(items, batch_size):
+    """Group an iterable into lists of at most `batch_size` items."""
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
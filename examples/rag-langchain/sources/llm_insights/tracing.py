@@ -0,0 +1,145 @@
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+
+# Ollama response fields worth keeping on a span; durations are reported in nanoseconds
+OLLAMA_COUNTS = ('prompt_eval_count', 'eval_count')
+OLLAMA_DURATIONS = ('total_duration', 'load_duration', 'prompt_eval_duration', 'eval_duration')
+
+class Span:
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.parent = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        stack = self.tracer._stack()
+        self.parent = stack[-1].name if stack else None
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.duration = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        self.tracer._stack().pop()
+        self.tracer._finish(self)
+        return False
+
+class _NoopSpan:
+    """Returned while tracing is off, so instrumented code costs one attribute check."""
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NOOP_SPAN = _NoopSpan()
+
+class Tracer:
+    """Records nested timing spans and writes them as JSON lines and/or a summary table."""
+
+    def __init__(self):
+        self.enabled = False
+        self.profile = False
+        self.sink = None
+        self.spans = []
+        self.lock = threading.Lock()
+        self.local = threading.local()
+
+    def configure(self, trace_path=None, profile=False):
+        """Turn tracing on; spans go to `trace_path` as JSON lines and a summary is printed at exit with `profile`."""
+        trace_path = trace_path or os.getenv('LLM_TRACE')
+        if not trace_path and not profile:
+            return
+        self.enabled = True
+        self.profile = profile
+        if trace_path:
+            self.sink = open(trace_path, 'a', encoding='utf-8')
+        atexit.register(self.close)
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return _NOOP_SPAN
+        return Span(self, name, attrs)
+
+    def _stack(self):
+        if not hasattr(self.local, 'stack'):
+            self.local.stack = []
+        return self.local.stack
+
+    def _finish(self, span):
+        record = {"name": span.name, "parent": span.parent, "ms": round(span.duration * 1000, 2), **span.attrs}
+        with self.lock:
+            if self.profile:
+                self.spans.append(record)
+            if self.sink:
+                self.sink.write(json.dumps(record, default=str) + "\n")
+                self.sink.flush()
+
+    def close(self):
+        if self.profile and self.spans:
+            self.print_summary()
+            self.spans = []
+        if self.sink:
+            self.sink.close()
+            self.sink = None
+
+    def print_summary(self, file=sys.stderr):
+        groups = defaultdict(list)
+        for record in self.spans:
+            groups[record['name']].append(record)
+        print(f"\n{'span':<24}{'count':>6}{'total ms':>11}{'mean ms':>10}{'max ms':>10}{'chunks':>8}{'prompt tok':>11}{'gen tok':>9}", file=file)
+        for name, records in groups.items():
+            durations = [r['ms'] for r in records]
+            print(f"{name:<24}{len(records):>6}{sum(durations):>11.1f}{sum(durations) / len(durations):>10.1f}{max(durations):>10.1f}"
+                  f"{sum(r.get('chunks', 0) for r in records):>8}"
+                  f"{sum(r.get('prompt_eval_count', 0) for r in records):>11}"
+                  f"{sum(r.get('eval_count', 0) for r in records):>9}", file=file)
+
+tracer = Tracer()
+
+def ollama_stats(response):
+    """Token counts and durations (converted to ms) from an Ollama response or LangChain response metadata."""
+    stats = {key: response[key] for key in OLLAMA_COUNTS if key in response}
+    stats.update({key.replace('_duration', '_ms'): round(response[key] / 1e6, 2) for key in OLLAMA_DURATIONS if key in response})
+    return stats
+
+def traced(runnable, name, describe=None):
+    """Wrap a LangChain runnable so each invocation records a span; returns it unchanged when tracing is off."""
+    if not tracer.enabled:
+        return runnable
+    from langchain.schema.runnable import RunnableLambda
+
+    def invoke(value):
+        with tracer.span(name) as span:
+            result = runnable.invoke(value)
+            if describe:
+                span.set(**describe(result))
+            return result
+    return RunnableLambda(invoke)
+
+def describe_documents(documents):
+    return {"chunks": len(documents)}
+
+def describe_message(message):
+    metadata = getattr(message, 'response_metadata', None) or getattr(message, 'generation_info', None) or {}
+    return ollama_stats(metadata)
+
+def add_arguments(parser):
+    """Add the --profile and --trace options to a CLI parser."""
+    parser.add_argument('--profile', action='store_true', help='Print a per-stage timing summary at exit')
+    parser.add_argument('--trace', help='Append per-stage timing spans to this JSON lines file (or set LLM_TRACE)')
@@ -0,0 +1,39 @@
+#!/usr/bin/env python
+
+import argparse
+import threading
+from llm_insights.scheduler import start_proxy, print_stats
+
+def parse_model_limit(value):
+    model, _, limit = value.rpartition('=')
+    if not model or not limit.isdigit():
+        raise argparse.ArgumentTypeError(f"expected MODEL=N, got {value!r}")
+    return model, int(limit)
+
+def main():
+    parser = argparse.ArgumentParser(description='Local scheduling proxy for Ollama: interactive requests go before batch work, '
+                                                 'each model gets a concurrency limit, and batch work is shed when its queue is full. '
+                                                 'Point the examples at it with OLLAMA_HOST=http://localhost:11436')
+    parser.add_argument('-p', '--port', type=int, default=11436, help='Port to listen on (default: 11436)')
+    parser.add_argument('-u', '--upstream', default='http://localhost:11434', help='Ollama server to forward to (default: http://localhost:11434)')
+    parser.add_argument('-c', '--max-concurrency', type=int, default=1, help='Requests per model running at once (default: 1, match OLLAMA_NUM_PARALLEL)')
+    parser.add_argument('--model-concurrency', type=parse_model_limit, action='append', default=[], metavar='MODEL=N',
+                        help='Concurrency limit for one model, e.g. llava:13b=1 (repeatable)')
+    parser.add_argument('--batch-queue', type=int, default=8, help='Batch requests allowed to wait per model before shedding (default: 8)')
+    parser.add_argument('--interactive-queue', type=int, default=64, help='Interactive requests allowed to wait per model before shedding (default: 64)')
+    parser.add_argument('--stats-interval', type=float, default=0, help='Print queue statistics every N seconds (default: off, see GET /scheduler/stats)')
+    args = parser.parse_args()
+
+    proxy = start_proxy(args.upstream, host='0.0.0.0', port=args.port, max_concurrency=args.max_concurrency,
+                        model_concurrency=dict(args.model_concurrency), batch_queue_limit=args.batch_queue,
+                        interactive_queue_limit=args.interactive_queue)
+    print(f"Scheduling proxy for {args.upstream} listening on port {args.port}, use OLLAMA_HOST=http://localhost:{args.port}")
+    stop = threading.Event()
+    try:
+        while not stop.wait(args.stats_interval or None):
+            print_stats(proxy.scheduler.stats())
+    except KeyboardInterrupt:
+        proxy.shutdown()
+
+if __name__ == "__main__":
+    main()
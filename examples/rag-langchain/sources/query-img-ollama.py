@@ -1,64 +1,41 @@
 import argparse
-import base64
-import requests
-import json
-
-def encode_image_to_base64(image_path):
-    """Encode the image to a base64-encoded string."""
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode('utf-8')
-
-def interactive_mode(model, base64_image_string):
-    """Handle interactive mode where the user can input multiple questions."""
-    print("Entering interactive mode. Type 'exit' to quit.")
-    while True:
-        question = input("Enter your question: ")
-        if question.lower() == 'exit':
-            break
-        else:
-            get_response(model, base64_image_string, question)
-
-def get_response(model, base64_image_string, question):
-    """Send request to the API and print the response."""
-    # Prepare the API request payload
-    payload = {
-        "model": model,
-        "prompt": question,
-        "stream": False,
-        "images": [base64_image_string]
-    }
-
-    # Specify the API endpoint URL
-    api_url = 'http://localhost:11434/api/generate'
-
-    # Make the API request
-    response = requests.post(api_url, data=json.dumps(payload))
-
-    # Check if the request was successful
-    if response.status_code == 200:
-        # Parse the JSON response
-        json_response = response.json()
-        print("Response from the model:", json_response.get("response"))
-    else:
-        print("Failed to get a response from the model, status code:", response.status_code)
+from llm_insights.images import BATCH_SIZE, ChatImage, DEFAULT_QUESTION
+from llm_insights.image_cache import ImageCache
+from llm_insights.tracing import tracer, add_arguments
 
 def main():
     # Set up argument parser
     parser = argparse.ArgumentParser(description='Interact with the Ollama API to analyze images.')
-    parser.add_argument('-f', '--filepath', required=True, help='File path of the image to analyze')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('-f', '--filepath', help='File path of the image to analyze')
+    source.add_argument('-d', '--directory', help='Directory of images to analyze in batch mode')
     parser.add_argument('-q', '--question', help='Question or prompt for the model')
     parser.add_argument('-m', '--model', default='llava:13b', help='Model to use (default: llava:13b)')
+    parser.add_argument('-o', '--output', default='results.jsonl', help='JSONL file for batch mode results (default: results.jsonl)')
+    parser.add_argument('--size', type=int, help=f'Longest image side sent to the model (default: the original image for a single file, {BATCH_SIZE} in batch mode; use 336 for llava 1.5)')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the image payload and answer cache')
+    parser.add_argument('--max-inflight', type=int, default=4, help='Concurrent requests in batch mode (default: 4)')
+    add_arguments(parser)
     args = parser.parse_args()
+    tracer.configure(args.trace, args.profile)
+
+    chat_image = ChatImage(model=args.model, cache=None if args.no_cache else ImageCache())
+
+    if args.directory:
+        # Batch mode
+        chat_image.batch_mode(args.directory, args.question or DEFAULT_QUESTION, args.output,
+                              size=args.size or BATCH_SIZE, max_inflight=args.max_inflight)
+        return
 
-    # Convert the image to base64
-    base64_image_string = encode_image_to_base64(args.filepath)
+    # Convert the image to base64, reusing the payload from an earlier run when there is one
+    chat_image.load_image(args.filepath, args.size)
 
     if args.question:
         # Single question mode
-        get_response(args.model, base64_image_string, args.question)
+        chat_image.get_response(args.question)
     else:
         # Interactive mode
-        interactive_mode(args.model, base64_image_string)
+        chat_image.interactive_mode()
 
 if __name__ == "__main__":
     main()
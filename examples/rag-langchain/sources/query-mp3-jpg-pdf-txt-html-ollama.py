@@ -1,243 +1,47 @@
 #!/usr/bin/env python
 
 import argparse
-import base64
-import requests
-import json
-import subprocess
 import os
-import sys
-from langchain_community.vectorstores import Chroma
-from langchain_community.chat_models import ChatOllama
-from langchain_community.embeddings import FastEmbedEmbeddings
-from langchain.schema.output_parser import StrOutputParser
-from langchain_community.document_loaders import PyPDFLoader, UnstructuredHTMLLoader, TextLoader
-from langchain.text_splitter import RecursiveCharacterTextSplitter
-from langchain.schema.runnable import RunnablePassthrough
-from langchain.prompts import PromptTemplate
-from langchain.vectorstores.utils import filter_complex_metadata
-
-class ChatPDF:
-    def __init__(self, model='mistral'):
-        self.vector_store = None
-        self.retriever = None
-        self.chain = None
-        self.model = ChatOllama(model=model)
-        self.text_splitter = RecursiveCharacterTextSplitter(chunk_size=1024, chunk_overlap=100)
-        self.prompt = PromptTemplate.from_template("""
-            <s> [Instruction] You are an assistant tasked with answering questions based on the provided document. Utilize the context from the document to formulate your response. If the answer is not available within the document, indicate that the information is not available. Aim for responses that are direct, informative, and no longer than three sentences. [/Instruction] </s>
-            [Instruction] Question: {question}
-            Context: {context}
-            Answer: [/Instruction]
-        """)
-
-    def ingest(self, file_path: str):
-        file_type = file_path.split('.')[-1].lower()
-        try:
-            if file_type == 'pdf':
-                docs = PyPDFLoader(file_path=file_path).load()
-            elif file_type == 'html':
-                docs = UnstructuredHTMLLoader(file_path=file_path).load()
-            elif file_type == 'txt':
-                docs = TextLoader(file_path=file_path).load()
-            else:
-                return "Unsupported file type"
-        except Exception as e:
-            return f"Failed to load document: {str(e)}"
-
-        chunks = self.text_splitter.split_documents(docs)
-        chunks = filter_complex_metadata(chunks)
-
-        self.vector_store = Chroma.from_documents(documents=chunks, embedding=FastEmbedEmbeddings())
-        self.retriever = self.vector_store.as_retriever(
-            search_type="similarity_score_threshold",
-            search_kwargs={
-                "k": 3,
-                "score_threshold": 0.2,
-            },
-        )
-
-        self.chain = ({"context": self.retriever, "question": RunnablePassthrough()}
-                      | self.prompt
-                      | self.model
-                      | StrOutputParser())
-
-    def ask(self, query: str):
-        if not self.chain:
-            return "Please, add a document first."
-
-        try:
-            return self.chain.invoke(query)
-        except Exception as e:
-            return f"Error during query processing: {str(e)}"
-
-    def clear(self):
-        self.vector_store = None
-        self.retriever = None
-        self.chain = None
-
-class ChatMode:
-    def __init__(self, model='mistral'):
-        self.model = model
-
-    def get_response(self, question):
-        """Send request to the Ollama API with the question and print the response."""
-        payload = {
-            "model": self.model,
-            "prompt": question,
-            "stream": False,
-        }
-        api_url = 'http://localhost:11434/api/generate'
-        response = requests.post(api_url, json=payload)
-        if response.status_code == 200:
-            json_response = response.json()
-            print("Response from the model:", json_response.get("response"))
-        else:
-            print("Failed to get a response from the model, status code:", response.status_code)
-
-    def interactive_mode(self):
-        """Handle interactive mode where the user can input multiple questions."""
-        print("Entering interactive mode. Type 'exit' to quit.")
-        while True:
-            question = input("Enter your question: ")
-            if question.lower() == 'exit':
-                break
-            else:
-                self.get_response(question=question)
-
-    def quick_mode(self, question):
-        """Handle quick mode where the user can input a single question."""
-        print("Quick mode: processing your question.")
-        self.get_response(question=question)
-
-    def ollama_mode(self):
-        """Start chat mode using `ollama run mistral`."""
-        print("Starting Ollama Mistral in chat mode...")
-        try:
-            subprocess.run(["ollama", "run", "mistral"], check=True)
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to start Ollama Mistral in chat mode: {e}")
-
-class ChatImage:
-    def __init__(self, model='llava:13b'):
-        self.model = model
-        self.base64_image_string = None
-
-    def encode_image_to_base64(self, image_path):
-        """Encode the image to a base64-encoded string."""
-        with open(image_path, "rb") as image_file:
-            self.base64_image_string = base64.b64encode(image_file.read()).decode('utf-8')
-
-    def get_response(self, question):
-        """Send request to the API and print the response."""
-        if not self.base64_image_string:
-            print("Please provide an image using the 'encode_image_to_base64' method before asking a question.")
-            return
-
-        payload = {
-            "model": self.model,
-            "prompt": question,
-            "stream": False,
-            "images": [self.base64_image_string]
-        }
-        api_url = 'http://localhost:11434/api/generate'
-        response = requests.post(api_url, json=payload)
-        if response.status_code == 200:
-            json_response = response.json()
-            print("Response from the model:", json_response.get("response"))
-        else:
-            print(f"Failed to get a response from the model, status code: {response.status_code}", file=sys.stderr)
-
-    def interactive_mode(self):
-        """Handle interactive mode where the user can input multiple questions."""
-        print("Entering interactive mode. Type 'exit' to quit.")
-        while True:
-            question = input("Enter your question: ")
-            if question.lower() == 'exit':
-                break
-            else:
-                self.get_response(question)
-
-class AudioTranscriber:
-    def __init__(self, whisper_exe_path, model_path):
-        self.whisper_exe_path = whisper_exe_path
-        self.model_path = model_path
-
-    def convert_mp3_to_wav(self, audio_file_path):
-        # Construct the command to convert MP3 to WAV using ffmpeg
-        wav_file_path = os.path.splitext(audio_file_path)[0] + '.wav'
-        command = [
-            'ffmpeg',
-            '-i', audio_file_path,
-            '-acodec', 'pcm_s16le',
-            '-ar', '16000',
-            '-ac', '1',
-            wav_file_path
-        ]
-
-        # Run the command to convert the audio file
-        result = subprocess.run(command, capture_output=True, text=True)
-
-        if result.returncode == 0:
-            print(f"Successfully converted {audio_file_path} to {wav_file_path}")
-            return wav_file_path
-        else:
-            print("Error converting audio:", result.stderr, file=sys.stderr)
-            return None
-
-    def transcribe_audio(self, audio_file_path, output_format='text'):
-        # Construct the command to run the Whisper CLI
-        command = [
-            self.whisper_exe_path + 'main',
-            '-m', self.model_path,
-            '-f', audio_file_path,
-            '-oj',  # Output the result in a JSON file
-        ]
-
-        # Run the command and capture the output
-        result = subprocess.run(command, capture_output=True, text=True)
-
-        if result.returncode == 0:
-            print(result.stdout)
-        else:
-            print("Error transcribing audio:", result.stderr, file=sys.stderr)
-
-    @staticmethod
-    def download_model():
-        print("git clone https://github.com/openai/whisper; git clone https://github.com/ggerganov/whisper.cpp")
-        print("cd whisper.cpp/models; git clone https://huggingface.co/distil-whisper/distil-medium.en")
-        print("python3 ./convert-h5-to-ggml.py ./distil-medium.en/ ../../whisper . ; mv ggml-model.bin ggml-medium.en-distil.bin")
-
-    def process_audio(self, audio_file_path):
-        # Check if the model file exists
-        if not os.path.exists(self.model_path):
-            print(f"Model file not found: {self.model_path}")
-            print("Please download the model first.")
-            self.download_model()
-            sys.exit(1)
-
-        # Check if the input file is in MP3 format
-        if audio_file_path.lower().endswith('.mp3'):
-            # Convert MP3 to WAV
-            wav_file_path = self.convert_mp3_to_wav(audio_file_path)
-            if wav_file_path:
-                # Transcribe the converted WAV file
-                self.transcribe_audio(wav_file_path)
-        else:
-            # Transcribe the audio file directly
-            self.transcribe_audio(audio_file_path)
+from llm_insights.audio import AudioTranscriber
+from llm_insights.chat import ChatMode
+from llm_insights.filetypes import sniff_kind
+from llm_insights.image_cache import ImageCache
+from llm_insights.images import ChatImage, DEFAULT_QUESTION
+from llm_insights.routing import add_arguments as add_routing_arguments, router_from_args
+from llm_insights.tracing import tracer, add_arguments
 
 class FileHandler:
-    def __init__(self, whisper_path):
+    def __init__(self, whisper_path, image_cache=None, prefetch=False, router_factory=None):
         self.whisper_path = whisper_path
-
-    def handle_document(self, file_path, model, text):
-        chat_document = ChatPDF(model=model)
-        chat_document.ingest(file_path)
-
+        self.image_cache = image_cache
+        self.prefetch = prefetch
+        # Builds a ModelRouter for the main model of a mode, or returns None when routing is off
+        self.router_factory = router_factory or (lambda model: None)
+
+    def handle_document(self, file_path, model, text, file_type=None):
+        # Imported here so image, audio and chat modes work without LangChain installed
+        from llm_insights.documents import ChatDocument
+        chat_document = ChatDocument(model=model, router=self.router_factory(model))
+        chat_document.ingest(file_path, file_type)
+        self.ask_documents(chat_document, text)
+
+    def handle_mixed(self, paths, model, text, whisper_model, caption_model):
+        from llm_insights.documents import ChatDocument
+        from llm_insights.ingest import MixedMediaIngest
+        chat_document = ChatDocument(model=model, router=self.router_factory(model))
+        ingest = MixedMediaIngest(chat_document, whisper_path=self.whisper_path, whisper_model=whisper_model,
+                                  caption_model=caption_model, image_cache=self.image_cache)
+        ingest.run(paths)
+        self.ask_documents(chat_document, text)
+
+    def ask_documents(self, chat_document, text):
         if text:
             answer = chat_document.ask(text)
             print(f"Answer: {answer}")
+        elif self.prefetch:
+            from llm_insights.prefetch import PrefetchSession
+            print("Document mode: type 'exit' to quit.")
+            PrefetchSession(chat_document).interactive_mode("Ask a question about the document: ")
         else:
             print("Document mode: type 'exit' to quit.")
             while True:
@@ -250,8 +54,8 @@ class FileHandler:
         chat_document.clear()
 
     def handle_image(self, file_path, model, text):
-        chat_image = ChatImage(model=model)
-        chat_image.encode_image_to_base64(file_path)
+        chat_image = ChatImage(model=model, cache=self.image_cache)
+        chat_image.load_image(file_path)
 
         if text:
             # Single question mode
@@ -260,12 +64,16 @@ class FileHandler:
             # Interactive mode
             chat_image.interactive_mode()
 
+    def handle_image_batch(self, directory, model, text, output_path):
+        chat_image = ChatImage(model=model, cache=self.image_cache)
+        chat_image.batch_mode(directory, text or DEFAULT_QUESTION, output_path)
+
     def handle_audio(self, file_path, model):
         transcriber = AudioTranscriber(self.whisper_path, model)
         transcriber.process_audio(file_path)
 
     def handle_chat_mode(self, model, text):
-        chat_mode = ChatMode(model=model)
+        chat_mode = ChatMode(model=model, router=self.router_factory(model))
 
         if text:
             chat_mode.quick_mode(text)
@@ -274,27 +82,44 @@ class FileHandler:
 
 def main():
     parser = argparse.ArgumentParser(description='Interact with the Ollama API, ask questions about a document, an image, or transcribe an audio file.')
-    parser.add_argument('-f', '--file', help='Path to the file (e.g. pdf, html, txt, jpg, png, mp3, wav)')
+    parser.add_argument('-f', '--file', help='Path to the file (e.g. pdf, html, txt, jpg, png, mp3, wav), or a directory of images for batch analysis')
+    parser.add_argument('-i', '--ingest', nargs='+', metavar='PATH', help='Files or directories of mixed documents, audio and images to index together and ask questions about')
     parser.add_argument('-t', '--text', help='Text input for the question or prompt')
     parser.add_argument('-m', '--model', type=str, help='Path to the model file (default: depends on file type)')
+    parser.add_argument('-o', '--output', default='results.jsonl', help='JSONL file for image batch results (default: results.jsonl)')
+    parser.add_argument('--prefetch', action='store_true', help='In document chat, keep the model warm, suggest follow-up questions and prefetch their context while you read')
+    parser.add_argument('--no-cache', action='store_true', help='Do not read or write the image payload and answer cache')
+    parser.add_argument('--whisper-model', default='/Users/chenhao/Github/whisper.cpp/models/ggml-medium.en-distil.bin', help='Whisper model file used for audio (default: /Users/chenhao/Github/whisper.cpp/models/ggml-medium.en-distil.bin)')
+    parser.add_argument('--caption-model', default='llava:13b', help='Vision model used to caption images in ingest mode (default: llava:13b)')
     parser.add_argument('-w', '--whisper-path', type=str, default='/Users/chenhao/Github/whisper.cpp/', help='Path to the Whisper executable directory (default: /Users/chenhao/Github/whisper.cpp/)')
+    add_arguments(parser)
+    add_routing_arguments(parser)
     args = parser.parse_args()
+    tracer.configure(args.trace, args.profile)
 
-    file_handler = FileHandler(args.whisper_path)
+    file_handler = FileHandler(args.whisper_path, image_cache=None if args.no_cache else ImageCache(), prefetch=args.prefetch,
+                               router_factory=lambda model: router_from_args(args, model))
 
-    if args.file:
-        file_extension = args.file.split('.')[-1].lower()
-        if file_extension in ['txt', 'html', 'pdf']:
+    if args.ingest:
+        model = args.model or 'mistral'
+        file_handler.handle_mixed(args.ingest, model, args.text, args.whisper_model, args.caption_model)
+    elif args.file and os.path.isdir(args.file):
+        model = args.model or 'llava:13b'
+        file_handler.handle_image_batch(args.file, model, args.text, args.output)
+    elif args.file:
+        # Dispatch on the content rather than the file name
+        kind = sniff_kind(args.file)
+        if kind in ['txt', 'html', 'pdf']:
             model = args.model or 'mistral'
-            file_handler.handle_document(args.file, model, args.text)
-        elif file_extension in ['jpg', 'png']:
+            file_handler.handle_document(args.file, model, args.text, kind)
+        elif kind == 'image':
             model = args.model or 'llava:13b'
             file_handler.handle_image(args.file, model, args.text)
-        elif file_extension in ['mp3', 'wav']:
-            model = args.model or '/Users/chenhao/Github/whisper.cpp/models/ggml-medium.en-distil.bin'
+        elif kind == 'audio':
+            model = args.model or args.whisper_model
             file_handler.handle_audio(args.file, model)
         else:
-            print("Unsupported file type. Please provide a file with a supported extension (txt, html, pdf, jpg, png, mp3, wav).")
+            print("Unsupported file type. Please provide a txt, html, pdf, jpg, png, mp3 or wav file.")
     else:
         model = args.model or 'mistral'
         file_handler.handle_chat_mode(model, args.text)
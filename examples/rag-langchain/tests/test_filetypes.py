@@ -0,0 +1,75 @@
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sources'))
+from llm_insights.audio import AudioTranscriber, strip_timestamps
+from llm_insights.filetypes import audio_format, sniff_kind, text_encoding
+
+REFERENCE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'reference')
+
+class TestFileTypes(unittest.TestCase):
+    def write(self, directory, name, content):
+        path = os.path.join(directory, name)
+        with open(path, 'wb') as f:
+            f.write(content)
+        return path
+
+    def test_reference_files(self):
+        self.assertEqual(sniff_kind(os.path.join(REFERENCE_DIR, 'paper.pdf')), 'pdf')
+        self.assertEqual(sniff_kind(os.path.join(REFERENCE_DIR, 'paper.jpg')), 'image')
+        self.assertEqual(sniff_kind(os.path.join(REFERENCE_DIR, 'ollama-api.md')), 'txt')
+
+    def test_content_wins_over_extension(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(sniff_kind(self.write(directory, 'scan.txt', b'%PDF-1.7\n')), 'pdf')
+            self.assertEqual(sniff_kind(self.write(directory, 'page', b'\n<!DOCTYPE html><html></html>')), 'html')
+            self.assertEqual(sniff_kind(self.write(directory, 'talk.bin', b'RIFF\x24\x00\x00\x00WAVEfmt ')), 'audio')
+            self.assertEqual(sniff_kind(self.write(directory, 'song', b'ID3\x04\x00')), 'audio')
+            self.assertEqual(sniff_kind(self.write(directory, 'notes', 'naïve notes\n'.encode('utf-8'))), 'txt')
+
+    def test_unknown_binary_is_unsupported(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertIsNone(sniff_kind(self.write(directory, 'blob.dat', b'\x00\x01\x02\x03')))
+            self.assertEqual(sniff_kind(self.write(directory, 'empty.wav', b'')), 'audio')
+
+    def test_unicode_text_is_not_mpeg_audio(self):
+        with tempfile.TemporaryDirectory() as directory:
+            utf16 = self.write(directory, 'notes.txt', 'meeting notes\n'.encode('utf-16'))
+            self.assertEqual(sniff_kind(utf16), 'txt')
+            self.assertEqual(text_encoding(utf16), 'utf-16')
+            self.assertEqual(sniff_kind(self.write(directory, 'page', b'\xfe\xff' + '<html></html>'.encode('utf-16-be'))), 'html')
+            self.assertEqual(sniff_kind(self.write(directory, 'bom.txt', '\ufeff<!DOCTYPE html>'.encode('utf-8'))), 'html')
+
+    def test_mpeg_frame_header(self):
+        with tempfile.TemporaryDirectory() as directory:
+            # MPEG-1 layer III, 128 kbit/s, 44.1 kHz
+            self.assertEqual(sniff_kind(self.write(directory, 'song', b'\xff\xfb\x90\x64' + b'\x00' * 8)), 'audio')
+            # Layer bits 00 and bitrate index 1111 are reserved
+            self.assertIsNone(sniff_kind(self.write(directory, 'blob1', b'\xff\xf9\x90\x64\x00')))
+            self.assertIsNone(sniff_kind(self.write(directory, 'blob2', b'\xff\xfb\xf0\x64\x00')))
+
+    def test_non_wav_audio_is_converted(self):
+        with tempfile.TemporaryDirectory() as directory:
+            model = self.write(directory, 'model.bin', b'')
+            wav = self.write(directory, 'talk.mp3', b'RIFF\x24\x00\x00\x00WAVEfmt ')
+            flac = self.write(directory, 'talk.wav', b'fLaC\x00\x00\x00\x22')
+            self.assertEqual(audio_format(wav), 'wav')
+            self.assertEqual(audio_format(flac), 'flac')
+
+            transcriber = AudioTranscriber(directory + os.sep, model)
+            converted, transcribed = [], []
+            transcriber.convert_to_wav = lambda path: converted.append(path) or path + '.16k.wav'
+            transcriber.transcribe_audio = lambda path, echo=True: transcribed.append(path) or 'text'
+            transcriber.process_audio(wav, echo=False)
+            transcriber.process_audio(flac, echo=False)
+            self.assertEqual(converted, [flac])
+            self.assertEqual(transcribed, [wav, flac + '.16k.wav'])
+
+    def test_strip_timestamps(self):
+        transcript = "\n[00:00:00.000 --> 00:00:11.000]   And so my fellow Americans,\n[00:00:11.000 --> 00:00:14.000]   ask not.\n"
+        self.assertEqual(strip_timestamps(transcript), "And so my fellow Americans, ask not.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,25 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sources'))
+from llm_insights.resources import ollama_url
+
+class TestOllamaUrl(unittest.TestCase):
+    def test_default(self):
+        self.assertEqual(ollama_url(None), 'http://localhost:11434')
+        self.assertEqual(ollama_url(''), 'http://localhost:11434')
+
+    def test_bind_addresses(self):
+        self.assertEqual(ollama_url('0.0.0.0'), 'http://localhost:11434')
+        self.assertEqual(ollama_url('127.0.0.1:11435'), 'http://127.0.0.1:11435')
+        self.assertEqual(ollama_url('0.0.0.0:8080'), 'http://localhost:8080')
+        self.assertEqual(ollama_url('[::]:11434'), 'http://localhost:11434')
+
+    def test_urls(self):
+        self.assertEqual(ollama_url('http://127.0.0.1:11435'), 'http://127.0.0.1:11435')
+        self.assertEqual(ollama_url('https://ollama.example.com/'), 'https://ollama.example.com:443')
+        self.assertEqual(ollama_url('http://[::1]:11434'), 'http://[::1]:11434')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sources'))
+from llm_insights.routing import ModelRouter
+
+class TestModelRouter(unittest.TestCase):
+    def setUp(self):
+        self.router = ModelRouter(small_model='phi3', large_model='mistral', max_small_words=10,
+                                  min_relevance=0.5, verbose=False)
+        self.calls = []
+
+    def generate(self, answers):
+        def call(model):
+            self.calls.append(model)
+            time.sleep(0.01 if model == 'phi3' else 0.05)
+            return answers[model]
+        return call
+
+    def test_short_relevant_questions_stay_on_the_small_model(self):
+        answer = self.router.answer('What is atopic dermatitis?', self.generate({'phi3': 'A chronic itchy skin condition.'}), relevance=0.8)
+        self.assertEqual(answer, 'A chronic itchy skin condition.')
+        self.assertEqual(self.calls, ['phi3'])
+
+    def test_long_questions_and_weak_retrieval_go_to_the_large_model(self):
+        self.assertEqual(self.router.route('word ' * 11)[0], 'mistral')
+        self.assertEqual(self.router.route('What is it?', relevance=0.3)[0], 'mistral')
+        self.assertEqual(self.router.route('What is it?')[0], 'phi3')
+
+    def test_hedged_answers_are_escalated(self):
+        answers = {'phi3': 'The information is not available in the document.', 'mistral': 'Scratching worsens the itch.'}
+        answer = self.router.answer('Why do patients scratch?', self.generate(answers), relevance=0.9)
+        self.assertEqual(answer, 'Scratching worsens the itch.')
+        self.assertEqual(self.calls, ['phi3', 'mistral'])
+        self.assertEqual(self.router.counts, {'small': 0, 'escalated': 1, 'large': 0})
+
+    def test_hedge_words_inside_a_confident_answer_are_not_escalated(self):
+        answers = {'phi3': 'Patients are unable to sleep because of the itch, although the exact cause is unclear.'}
+        answer = self.router.answer('Why do patients sleep badly?', self.generate(answers), relevance=0.9)
+        self.assertEqual(answer, answers['phi3'])
+        self.assertEqual(self.calls, ['phi3'])
+        self.assertIsNone(self.router.escalation_reason('The trial found no difference; results were not mentioned as significant.'))
+        self.assertIsNotNone(self.router.escalation_reason('Eczema is common. However, the document does not mention its cause.'))
+        self.assertIsNotNone(self.router.escalation_reason("I'm not sure, but it may be genetic."))
+
+    def test_savings_are_estimated_against_the_large_model(self):
+        self.assertIsNone(self.router.estimated_savings())
+        self.router.answer('word ' * 11, self.generate({'mistral': 'A long and careful answer.'}))
+        self.router.answer('Short one?', self.generate({'phi3': 'A short but confident answer.'}))
+        self.assertGreater(self.router.estimated_savings(), 0.02)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', 'sources'))
+sys.path.insert(0, os.path.join(TESTS_DIR, '..', '..', 'benchmark', 'sources'))
+from llm_insights import client
+from llm_insights.scheduler import start_proxy
+from mock_ollama import start_server
+
+class TestScheduler(unittest.TestCase):
+    def setUp(self):
+        self.server = start_server(first_token_latency=0.2, token_latency=0.0, tokens=3)
+
+    def tearDown(self):
+        self.proxy.shutdown()
+        self.server.shutdown()
+
+    def generate(self, priority, prompt='hello', model='mistral'):
+        payload = json.dumps({"model": model, "prompt": prompt, "stream": False}).encode('utf-8')
+        request = urllib.request.Request(self.proxy.url + '/api/generate', data=payload, headers={'X-Priority': priority})
+        with urllib.request.urlopen(request) as response:
+            return json.loads(response.read())
+
+    def stats(self):
+        with urllib.request.urlopen(self.proxy.url + '/scheduler/stats') as response:
+            return json.loads(response.read())
+
+    def wait_for(self, condition, timeout=2.0):
+        deadline = time.perf_counter() + timeout
+        while not condition():
+            self.assertLess(time.perf_counter(), deadline, "condition not reached in time")
+            time.sleep(0.01)
+
+    def test_streamed_response_is_relayed(self):
+        self.proxy = start_proxy(self.server.url)
+        request = urllib.request.Request(self.proxy.url + '/api/generate',
+                                         data=json.dumps({"model": "mistral", "prompt": "hi"}).encode('utf-8'))
+        with urllib.request.urlopen(request) as response:
+            chunks = [json.loads(line) for line in response.read().decode('utf-8').splitlines() if line]
+        self.assertEqual(len(chunks), 4)
+        self.assertTrue(chunks[-1]["done"])
+        self.assertEqual(self.stats()["mistral"]["interactive"]["completed"], 1)
+
+    def test_interactive_requests_overtake_queued_batch_work(self):
+        self.proxy = start_proxy(self.server.url, max_concurrency=1)
+        finished = []
+
+        def run(priority, name):
+            self.generate(priority)
+            finished.append(name)
+
+        threads = [threading.Thread(target=run, args=('batch', f'batch{i}')) for i in range(3)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        interactive = threading.Thread(target=run, args=('interactive', 'interactive'))
+        interactive.start()
+        for thread in threads + [interactive]:
+            thread.join()
+
+        # The first batch request already holds the only slot, the interactive one goes next
+        self.assertEqual(finished[:2], ['batch0', 'interactive'])
+        stats = self.stats()["mistral"]
+        self.assertEqual(stats["batch"]["completed"], 3)
+        self.assertGreater(stats["batch"]["queue_p95_ms"], stats["interactive"]["queue_p95_ms"])
+
+    def test_batch_work_is_shed_when_its_queue_is_full(self):
+        self.proxy = start_proxy(self.server.url, max_concurrency=1, batch_queue_limit=0)
+        busy = threading.Thread(target=self.generate, args=('interactive',))
+        busy.start()
+        time.sleep(0.05)
+        with self.assertRaises(urllib.error.HTTPError) as raised:
+            self.generate('batch')
+        self.assertEqual(raised.exception.code, 503)
+        self.assertGreaterEqual(int(raised.exception.headers['Retry-After']), 1)
+        busy.join()
+        # The proxy frees the slot just after relaying the response
+        self.wait_for(lambda: self.stats()["mistral"]["interactive"]["completed"] == 1)
+        # With the model idle again, batch work is admitted
+        self.assertTrue(self.generate('batch')["done"])
+        self.assertEqual(self.stats()["mistral"]["batch"]["shed"], 1)
+
+    def test_client_raises_when_batch_work_stays_shed(self):
+        self.proxy = start_proxy(self.server.url, max_concurrency=1, batch_queue_limit=0)
+        busy = threading.Thread(target=self.generate, args=('interactive',))
+        busy.start()
+        time.sleep(0.05)
+        host, retries = client.OLLAMA_HOST, client.MAX_RETRIES
+        client.OLLAMA_HOST, client.MAX_RETRIES = self.proxy.url, 0
+        try:
+            with self.assertRaises(client.Shed):
+                client.generate('hello', priority='batch')
+        finally:
+            client.OLLAMA_HOST, client.MAX_RETRIES = host, retries
+            busy.join()
+
+    def test_models_have_separate_limits(self):
+        self.proxy = start_proxy(self.server.url, max_concurrency=1, model_concurrency={'llava:13b': 2})
+        start = time.perf_counter()
+        threads = [threading.Thread(target=self.generate, args=('batch', 'hi', 'llava:13b')) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertLess(time.perf_counter() - start, 0.39)
+        self.assertEqual(self.stats()["llava:13b"]["limit"], 2)
+
+if __name__ == '__main__':
+    unittest.main()
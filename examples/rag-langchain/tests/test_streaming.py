@@ -0,0 +1,71 @@
+import os
+import sys
+import tempfile
+import tracemalloc
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sources'))
+from llm_insights.streaming import iter_batches, iter_html_text, iter_text_blocks, split_stream
+
+class TestStreaming(unittest.TestCase):
+    def write(self, directory, name, text):
+        path = os.path.join(directory, name)
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        return path
+
+    def test_blocks_do_not_cut_multibyte_characters(self):
+        with tempfile.TemporaryDirectory() as directory:
+            text = 'naïve café ünïcödé ' * 50
+            path = self.write(directory, 'notes.txt', text)
+            blocks = list(iter_text_blocks(path, block_size=7))
+            self.assertEqual(''.join(blocks), text)
+            self.assertTrue(all(len(block) <= 7 for block in blocks))
+
+    def test_html_is_stripped_across_block_boundaries(self):
+        with tempfile.TemporaryDirectory() as directory:
+            html = ('<html><head><title>x</title><style>p { color: red; }</style></head>'
+                    '<body><p>Atopic &amp; dermatitis</p><script>var scratch = 1;</script><p>itch</p></body></html>')
+            path = self.write(directory, 'page.html', html)
+            text = ''.join(iter_html_text(path, block_size=5))
+            self.assertIn('Atopic & dermatitis', text)
+            self.assertIn('itch', text)
+            self.assertNotIn('color', text)
+            self.assertNotIn('scratch', text)
+
+    def test_html_without_closing_head_keeps_the_body(self):
+        with tempfile.TemporaryDirectory() as directory:
+            html = '<html><head><title>Log</title><body><p>Atopic dermatitis itch</p><p>Night scratching</p>'
+            path = self.write(directory, 'page.html', html)
+            text = ''.join(iter_html_text(path, block_size=7))
+            self.assertIn('Log', text)
+            self.assertIn('Atopic dermatitis itch', text)
+            self.assertIn('Night scratching', text)
+
+    def test_chunks_are_bounded_and_overlap(self):
+        words = [f"word{i}" for i in range(2000)]
+        blocks = (' '.join(words[i:i + 37]) + ' ' for i in range(0, len(words), 37))
+        chunks = list(split_stream(blocks, chunk_size=200, chunk_overlap=40))
+        self.assertTrue(all(len(chunk) <= 200 for chunk in chunks))
+        self.assertEqual(chunks[0].split()[0], 'word0')
+        self.assertEqual(chunks[-1].split()[-1], 'word1999')
+        for previous, chunk in zip(chunks, chunks[1:]):
+            self.assertIn(chunk.split()[0], previous.split())
+        seen = set(word for chunk in chunks for word in chunk.split())
+        self.assertEqual(seen, set(words))
+
+    def test_memory_is_bounded_by_block_not_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'big.txt')
+            with open(path, 'w', encoding='utf-8') as f:
+                for i in range(200000):
+                    f.write(f"line {i} of a large log export with some padding text\n")
+            tracemalloc.start()
+            count = sum(len(batch) for batch in iter_batches(split_stream(iter_text_blocks(path, block_size=64 * 1024)), 32))
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            self.assertGreater(count, 10000)
+            self.assertLess(peak, os.path.getsize(path) // 4)
+
+if __name__ == '__main__':
+    unittest.main()
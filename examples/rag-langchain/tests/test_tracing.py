@@ -0,0 +1,35 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'sources'))
+from llm_insights.tracing import Tracer, ollama_stats
+
+class TestTracing(unittest.TestCase):
+    def test_disabled_tracer_records_nothing(self):
+        tracer = Tracer()
+        with tracer.span('ask') as span:
+            span.set(chunks=3)
+        self.assertEqual(tracer.spans, [])
+
+    def test_nested_spans_are_written_as_json_lines(self):
+        with tempfile.TemporaryDirectory() as directory:
+            trace_path = os.path.join(directory, 'trace.jsonl')
+            tracer = Tracer()
+            tracer.configure(trace_path)
+            with tracer.span('ask'):
+                with tracer.span('ollama.generate') as span:
+                    span.set(**ollama_stats({"eval_count": 12, "prompt_eval_duration": 2500000}))
+            tracer.close()
+            with open(trace_path) as f:
+                records = [json.loads(line) for line in f]
+
+        self.assertEqual([r['name'] for r in records], ['ollama.generate', 'ask'])
+        self.assertEqual(records[0]['parent'], 'ask')
+        self.assertEqual(records[0]['eval_count'], 12)
+        self.assertEqual(records[0]['prompt_eval_ms'], 2.5)
+
+if __name__ == '__main__':
+    unittest.main()
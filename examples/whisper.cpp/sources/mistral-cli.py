@@ -1,47 +1,150 @@
 import argparse
-import requests
-import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-def interactive_mode(text):
+# The shared example package lives next to the RAG scripts
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'rag-langchain', 'sources'))
+from llm_insights import client
+
+def interactive_mode(text, long_input=False, window_size=6000, workers=4):
     """Handle interactive mode where the user can input multiple questions."""
     print("Entering interactive mode with the transcribed text. Type 'exit' to quit.")
     while True:
         question = input("Enter your question: ")
         if question.lower() == 'exit':
             break
+        elif long_input:
+            answer = map_reduce_response(text=text, question=question, window_size=window_size, workers=workers)
+            if answer is not None:
+                print("Response from the model:", answer)
         else:
             # Assuming that 'text' should be included in the payload
             get_response(text=text, question=question)
 
+def generate(prompt, model='mistral', priority='interactive'):
+    """Send a prompt to the Ollama API and return the response text, or None on failure."""
+    json_response = client.generate(prompt, model=model, priority=priority)
+    return json_response.get("response") if json_response is not None else None
+
 def get_response(text, question, model='mistral'):
     """Send request to the Ollama API with the transcribed text and print the response."""
-    # Prepare the API request payload, assuming 'prompt' needs both the text and the question
-    prompt_format = f"{text}\n\n###\n\n{question}"
-    payload = {
-        "model": model,
-        "prompt": prompt_format,
-        "stream": False,
-    }
-
-    # Specify the Ollama API endpoint URL
-    api_url = 'http://localhost:11434/api/generate'
-
-    # Make the API request
-    response = requests.post(api_url, json=payload)  # Use json=payload to automatically set Content-Type to application/json
-
-    # Check if the request was successful
-    if response.status_code == 200:
-        # Parse the JSON response
-        json_response = response.json()
-        print("Response from the model:", json_response.get("response"))
-    else:
-        print("Failed to get a response from the model, status code:", response.status_code)
+    # The prompt carries both the transcribed text and the question
+    answer = generate(f"{text}\n\n###\n\n{question}", model)
+    if answer is not None:
+        print("Response from the model:", answer)
+
+def window_overlap(window_size):
+    """Characters shared by neighbouring windows: a tenth of the window, at most 200."""
+    return min(200, window_size // 10)
+
+def split_windows(text, window_size=6000, overlap=None):
+    """Split the transcript into overlapping windows of at most window_size characters, preferring whitespace boundaries."""
+    if overlap is None:
+        overlap = window_overlap(window_size)
+    if window_size <= overlap:
+        raise ValueError(f"window size {window_size} must be larger than the overlap of {overlap} characters")
+    windows = []
+    start = 0
+    while start < len(text):
+        end = min(start + window_size, len(text))
+        if end < len(text):
+            # Back off to the last whitespace so words are not cut in half
+            boundary = text.rfind(' ', start + window_size // 2, end)
+            if boundary != -1:
+                end = boundary
+        windows.append(text[start:end].strip())
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return [window for window in windows if window]
+
+def map_reduce_response(text, question, model='mistral', window_size=6000, workers=4, fan_in=4):
+    """Answer a question about a transcript longer than the model context.
+
+    The map step asks the question against every window concurrently with at most
+    `workers` requests in flight; the reduce step merges the partial answers in
+    groups of `fan_in` until a single answer is left. When any window or merge gets
+    no answer, because it failed or the scheduler proxy shed it, None is returned
+    rather than an answer built from part of the transcript.
+    """
+    windows = split_windows(text, window_size=window_size)
+    print(f"Long-input mode: {len(text)} characters split into {len(windows)} windows.")
+
+    # Map: one request per window, bounded by the worker count
+    map_start = time.perf_counter()
+    partials = [None] * len(windows)
+    shed = []
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(generate, f"{window}\n\n###\n\n{question}", model, 'batch'): index
+            for index, window in enumerate(windows)
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                partials[futures[future]] = future.result()
+            except client.Shed:
+                shed.append(futures[future])
+            print(f"  map {done}/{len(windows)} windows done")
+    print(f"Map stage took {time.perf_counter() - map_start:.1f}s")
+
+    # An answer built from some of the windows would silently leave parts of the transcript out
+    missing = [index for index, partial in enumerate(partials) if not partial]
+    if missing:
+        numbers = ', '.join(str(index + 1) for index in missing)
+        print(f"No answer for {len(missing)} of {len(windows)} windows ({numbers}): {len(shed)} shed by the scheduler proxy, "
+              f"{len(missing) - len(shed)} failed. Not answering from part of the transcript; try again or lower --workers.",
+              file=sys.stderr)
+        return None
+
+    # Reduce: merge partial answers level by level until one is left
+    level = 0
+    while len(partials) > 1:
+        level += 1
+        reduce_start = time.perf_counter()
+        groups = [partials[i:i + fan_in] for i in range(0, len(partials), fan_in)]
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                merged = list(executor.map(lambda group: generate(reduce_prompt(group, question), model, 'batch'), groups))
+        except client.Shed as e:
+            print(f"Reduce level {level} failed: {e}", file=sys.stderr)
+            return None
+        print(f"Reduce level {level}: {len(groups)} groups merged in {time.perf_counter() - reduce_start:.1f}s")
+        failed = sum(1 for answer in merged if not answer)
+        if failed:
+            print(f"Reduce level {level}: {failed} groups failed, not answering from part of the transcript.",
+                  file=sys.stderr)
+            return None
+        partials = merged
+
+    return partials[0]
+
+def reduce_prompt(partials, question):
+    """Build the prompt that merges partial answers from consecutive transcript windows."""
+    numbered = "\n\n".join(f"Part {i}:\n{partial}" for i, partial in enumerate(partials, start=1))
+    return (f"The following are answers to the same question, each based on a consecutive part of a long transcript.\n\n"
+            f"{numbered}\n\n###\n\n"
+            f"Combine them into a single answer to the question: {question}")
 
 def main():
     parser = argparse.ArgumentParser(description='Interact with the Ollama API using the transcribed text.')
-    parser.add_argument('-t', '--text', required=True, help='The transcribed text to analyze and ask questions about')
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('-t', '--text', help='The transcribed text to analyze and ask questions about')
+    source.add_argument('-f', '--file', help='Path to a text file containing the transcribed text')
+    parser.add_argument('-l', '--long', action='store_true', help='Split the text into windows and answer with map-reduce (for transcripts longer than the model context)')
+    parser.add_argument('--window-size', type=int, default=6000, help='Characters per window in long-input mode (default: 6000)')
+    parser.add_argument('--workers', type=int, default=4, help='Concurrent requests to Ollama in long-input mode (default: 4)')
     args = parser.parse_args()
-    interactive_mode(args.text)
+    if args.window_size <= window_overlap(args.window_size):
+        parser.error(f"--window-size must be larger than the {window_overlap(args.window_size)} character overlap")
+
+    text = args.text
+    if args.file:
+        with open(args.file, encoding='utf-8') as f:
+            text = f.read()
+
+    interactive_mode(text, long_input=args.long, window_size=args.window_size, workers=args.workers)
 
 if __name__ == "__main__":
     main()